@@ -1,396 +1,476 @@
 # f1.py
 import streamlit as st
+import csv
 import datetime
-import random
-
-
-# --- CONSTANTS ---
-
-# Centralizing questions makes the chatbot function cleaner.
-QUESTIONS = [
-    "1. Do your friends come to you for advice?",
-    "2. What do you think about your appearance?",
-    "3. How do you find yourself in doing physical work?",
-    "4. How do you find your temperament?",
-    "5. How do you like school studies?",
-    "6. Do you believe in religious customs and traditions?",
-    "7. Do you participate in criticizing others?",
-    "8. Do you express your ideas frankly in the presence of others?",
-    "9. How do you like your complexion?",
-    "10. Do you think of yourself as cheerful?",
-    "11. Do you behave abnormally also?",
-    "12. Do you think yourself an experienced person?",
-    "13. Do you think about your teachers?",
-    "14. Do you think yourself to be a cool-tempered person?",
-    "15. Are you regular in doing your homework assignments?",
-    "16. Do you insult others?",
-    "17. Do you have difficulty in understanding something when the teacher explains it in class?",
-    "18. Do you think if you get an opportunity you can discover something new?",
-    "19. Do you feel irritated if somebody finds fault with your work?",
-    "20. How do you find your personality?",
-    "21. How do you like the company of others?",
-    "22. How much are you satisfied with your weight?",
-    "23. Do you feel irritated while you face petty difficulties?",
-    "24. How much are you satisfied with the present position of your studies in class?",
-    "25. How do you like school examinations?",
-    "26. How is your voice?",
-    "27. Do you take care of the merits and demerits of a work before doing it?",
-    "28. Where do you place yourself while speaking truth?",
-    "29. Where do you place yourself in obeying public rules?",
-    "30. Are you more intelligent than your colleagues?",
-    "31. Do you take part in organizing it when your classmates go to a picnic?",
-    "32. What will you do if you are doing some important work and your friends ask you to accompany them for a walk?",
-    "33. While taking an examination you are not able to answer some questions and a book of the same subject is lying near you, will you take help of the book?",
-    "34. If you get an opportunity to drink water in the house of so-called low-caste persons, what will you do?",
-    "35. Do you hesitate in mixing with persons of the opposite sex?",
-    "36. You are standing in the bus queue for a long time when the bus comes, the conductor takes some passengers and stops at your turn because there is no space in the bus, what will you do?"
-]
-
-# Storing advice and quotes in a central dictionary improves organization.
-ADVICE_AND_QUOTES = {
-    "Physical": {
-        "negative": "Start with light activities like walking or yoga to build confidence in your physical abilities.",
-        "neutral": "You're doing well physically; try adding variety like resistance training to keep progressing.",
-        "positive": "Awesome physical confidence! Keep pushing your limits with challenging workouts.",
-        "quotes": [
-            "The body achieves what the mind believes.",
-            "Strength does not come from physical capacity. It comes from an indomitable will. - Mahatma Gandhi",
-            "Take care of your body. It's the only place you have to live. - Jim Rohn"
-        ]
-    },
-    "Social": {
-        "negative": "Join a group activity or fitness class to boost social confidence.",
-        "neutral": "Your social skills are solid; try initiating conversations to build stronger connections.",
-        "positive": "You're a social star! Keep fostering those relationships.",
-        "quotes": [
-            "The greatest glory in living lies not in never falling, but in rising every time we fall. - Nelson Mandela",
-            "Surround yourself with only people who are going to lift you higher. - Oprah Winfrey",
-            "Friendship is born at that moment when one person says to another: 'What! You too? I thought I was the only one.' - C.S. Lewis"
-        ]
-    },
-    "Temperamental": {
-        "negative": "Practice deep breathing or meditation to manage stress and improve your temperament.",
-        "neutral": "Your temperament is balanced; mindfulness can help maintain that calm.",
-        "positive": "Your cool-headedness is inspiring! Keep it up.",
-        "quotes": [
-            "Patience is not the ability to wait, but the ability to keep a good attitude while waiting.",
-            "He who controls others may be powerful, but he who has mastered himself is mightier still. - Lao Tzu",
-            "The greatest remedy for anger is delay. - Seneca"
-        ]
-    },
-    "Educational": {
-        "negative": "Set small, achievable study goals to boost your confidence in learning.",
-        "neutral": "You're on a good path educationally; try new study techniques to enhance progress.",
-        "positive": "Your love for learning is fantastic! Keep exploring new knowledge.",
-        "quotes": [
-            "Education is the most powerful weapon which you can use to change the world. - Nelson Mandela",
-            "The beautiful thing about learning is that no one can take it away from you. - B.B. King",
-            "An investment in knowledge pays the best interest. - Benjamin Franklin"
-        ]
-    },
-    "Moral": {
-        "negative": "Reflect on your core values to guide your actions more consistently.",
-        "neutral": "Your moral compass is steady; keep making ethical choices.",
-        "positive": "Your integrity shines! Continue being a role model.",
-        "quotes": [
-            "Integrity is doing the right thing, even when no one is watching. - C.S. Lewis",
-            "The time is always right to do what is right. - Martin Luther King Jr.",
-            "Honesty is the first chapter in the book of wisdom. - Thomas Jefferson"
-        ]
-    },
-    "Intellectual": {
-        "negative": "Stimulate your mind with puzzles, books, or new skills to boost intellectual confidence.",
-        "neutral": "Your intellectual curiosity is great; challenge yourself with complex problems.",
-        "positive": "Your intellect is thriving! Keep exploring new ideas.",
-        "quotes": [
-            "The mind is not a vessel to be filled but a fire to be kindled. - Plutarch",
-            "Intelligence is the ability to adapt to change. - Stephen Hawking",
-            "The true sign of intelligence is not knowledge but imagination. - Albert Einstein"
-        ]
-    }
-}
+import io
+import uuid
+
+from engine import (
+    ADVICE_AND_QUOTES, BODYBUILDING_GOALS, GOAL_TYPES, LEVELS, QUESTIONS, SCORE_COMMENTARY, SPLITS, SPORTS, CategoryResult,
+    SurveyResult, get_plan, plan_cache_info, plan_key, prewarm_plan_cache, score_survey, survey_result,
+    workout_day_options
+)
+from data_transfer import LOG_COLUMNS, PROGRAM_COLUMNS, import_logs, log_rows, program_rows, read_csv, write_csv
+from log_store import LogStore
+from plan_builder import (
+    MAX_DAYS, MAX_MINUTES, MIN_DAYS, MIN_MINUTES, PlanCutShort, complete_plan, estimate_minutes, load_exercise_index,
+    make_constraints
+)
+from periodization import DEFAULT_WEEKS, MAX_WEEKS, MIN_WEEKS, PROGRESSION_MODELS, make_program, program_week, schedule
+from profile_store import ProfileStore
+from progression import progress_day
+from compact_state import intern_strings, pack_responses
+from workout_log import MAX_COUNT, LogEntry, SetRecord, format_entry
+import profiling
+from profiling import measure, timed
 
 
 # --- SURVEY & ANALYSIS FUNCTIONS ---
 
-def run_chatbot():
+# Questions shown per survey page. Each page is one form submission, so
+# 6 pages cover all 36 questions; set to 1 for the old one-question-per-rerun flow.
+SURVEY_PAGE_SIZE = 6
+
+def _submit_survey_page(start, stop):
+    """Form callback: stores the answers for questions [start, stop) and advances one page."""
+    state = st.session_state.survey_state
+    answers = [st.session_state.get(f"ans_{i}") for i in range(start, stop)]
+    if None in answers:
+        state['incomplete'] = True
+        return
+    state['incomplete'] = False
+    del state['responses'][start:]
+    state['responses'].extend(int(a) for a in answers)
+    state['current_question'] = stop
+
+def _survey_back(page_size):
+    """Form callback: returns to the previous page and drops its answers."""
+    state = st.session_state.survey_state
+    start = max(0, state['current_question'] - page_size)
+    del state['responses'][start:]
+    state['current_question'] = start
+    state['incomplete'] = False
+
+def run_chatbot(page_size=SURVEY_PAGE_SIZE):
     """
-    Manages the state and display of the survey questions.
+    Manages the state and display of the survey questions, one page of questions per form.
+    Answers are handled in form callbacks, so each page costs a single rerun.
     Returns a list of responses when the survey is complete, otherwise returns None.
     """
     if 'survey_state' not in st.session_state:
         st.session_state.survey_state = {
-            'responses': [],
+            # One byte per answer; packed into bytes once the survey is complete
+            'responses': bytearray(),
             'current_question': 0
         }
 
     state = st.session_state.survey_state
     
     if state['current_question'] < len(QUESTIONS):
-        idx = state['current_question']
-        st.write(f"**Question {idx + 1}/{len(QUESTIONS)}**")
-        st.write(f"👉 {QUESTIONS[idx]}")
-        st.write("*(Please rate on a scale of 1 to 5)*")
-
-        # Use columns for a cleaner button layout
-        cols = st.columns(6)
-        chosen_option = None
-        for i, val in enumerate([1, 2, 3, 4, 5]):
-            if cols[i].button(str(val), key=f"ans_{idx}_{val}"):
-                chosen_option = val
-        
-        # Back button logic
-        if cols[5].button("⬅️ Back", key=f"back_{idx}"):
-            if state['current_question'] > 0:
-                state['current_question'] -= 1
-                if state['responses']:
-                    state['responses'].pop()
-                st.rerun()
-
-        if chosen_option is not None:
-            state['responses'].append(int(chosen_option))
-            state['current_question'] += 1
-            st.rerun()
+        start = state['current_question']
+        stop = min(start + page_size, len(QUESTIONS))
+        st.progress(start / len(QUESTIONS))
+        st.write(f"**Questions {start + 1}-{stop}/{len(QUESTIONS)}**")
+        st.write("*(Please rate each on a scale of 1 to 5)*")
+
+        with st.form(f"survey_page_{start}"):
+            for idx in range(start, stop):
+                st.radio(f"👉 {QUESTIONS[idx]}", [1, 2, 3, 4, 5], index=None, horizontal=True, key=f"ans_{idx}")
+
+            c1, c2 = st.columns(2)
+            c1.form_submit_button("⬅️ Back", use_container_width=True, disabled=(start == 0),
+                                  on_click=_survey_back, args=(page_size,))
+            c2.form_submit_button("Next ➡️", use_container_width=True,
+                                  on_click=_submit_survey_page, args=(start, stop))
+
+        if state.get('incomplete'):
+            st.warning("Please answer every question on this page before continuing.")
             
         return None # Survey is still in progress
     else:
         st.success("✅ Survey complete! Thanks for participating!")
-        final_responses = state['responses']
-        # Reset for next time
+        final_responses = pack_responses(state['responses'])
+        # Reset for next time; the radio widgets' copies of the answers are no longer needed
         del st.session_state.survey_state
+        for idx in range(len(QUESTIONS)):
+            st.session_state.pop(f"ans_{idx}", None)
         return final_responses
 
-def analyze_sentiment(category_responses):
-    """Calculates the sentiment based on the sum of responses for a category."""
-    category_sum = sum(category_responses)
-    if category_sum < 18:
-        return "negative", category_sum
-    elif category_sum == 18:
-        return "neutral", category_sum
-    else:
-        return "positive", category_sum
-
-def get_score_commentary(score):
-    """Provides a detailed comment based on the total self-image score."""
-    if score <= 64:
-        return """
-        <div style="background-color: #FFD2D2; padding: 10px; border-radius: 5px;">
-        <strong>Needs Attention:</strong> Your score suggests you may be experiencing a period of significant self-doubt across several areas. It's important to acknowledge these feelings without judgment. This is a starting point for growth. Consider focusing on small, achievable goals in one area, like taking a short walk each day (Physical) or reaching out to one friend (Social), to begin building momentum. Remember to be kind to yourself during this process.
-        </div>
-        """
-    elif score <= 93:
-        return """
-        <div style="background-color: #FFE9D2; padding: 10px; border-radius: 5px;">
-        <strong>Room for Growth:</strong> Your responses indicate some areas of confidence mixed with others where you feel less secure. This is quite common. Try to identify the specific areas where you feel less positive and explore the reasons behind them. The advice in the sections above can provide targeted strategies. Celebrating small wins can be a powerful way to start shifting your overall perspective.
-        </div>
-        """
-    elif score <= 122:
-        return """
-        <div style="background-color: #D2EFFF; padding: 10px; border-radius: 5px;">
-        <strong>Balanced Perspective:</strong> You seem to have a generally balanced self-view, with a solid foundation of self-esteem. You likely have areas where you feel strong and others you'd like to improve, which is a healthy and realistic outlook. Continue to nurture your strengths while exploring the targeted advice for areas you wish to develop further.
-        </div>
-        """
-    elif score <= 151:
-        return """
-        <div style="background-color: #D2FFD8; padding: 10px; border-radius: 5px;">
-        <strong>Confident Outlook:</strong> You have a strong and positive self-image. You are likely confident in your abilities and decisions, navigating challenges with a resilient mindset. Keep fostering this positive self-perception by continuing to engage in activities that align with your values and challenge you in healthy ways. Your positive outlook can be an inspiration to others.
-        </div>
-        """
-    else: # score > 151
-        return """
-        <div style="background-color: #E6D2FF; padding: 10px; border-radius: 5px;">
-        <strong>Very High Self-Esteem:</strong> Your score reflects a very high level of self-confidence and self-acceptance. You have a clear understanding of your strengths and value yourself highly. This is a fantastic asset. Continue to leverage this self-assurance to pursue your goals and uplift those around you. Ensure this confidence is paired with an openness to feedback for continuous growth.
-        </div>
-        """
-
-def display_survey_results(responses):
+@timed("display_survey_results")
+def display_survey_results(result):
     """
-    Analyzes and displays the survey results and advice.
-    This function avoids repeating the analysis logic.
+    Displays a SurveyResult and its advice. Scores, bands and quotes were fixed when the
+    survey was completed, so every rerun shows the same page and only looks text up.
     """
     st.header("Mental Checkup Results")
     st.write("Here's a breakdown of your self-perception based on your answers.")
 
-    categories = {
-        "Physical": [responses[1], responses[2], responses[8], responses[19], responses[21], responses[25]],
-        "Social": [responses[0], responses[7], responses[20], responses[30], responses[31], responses[34]],
-        "Temperamental": [responses[3], responses[9], responses[13], responses[15], responses[18], responses[22]],
-        "Educational": [responses[4], responses[12], responses[14], responses[16], responses[23], responses[24]],
-        "Moral": [responses[5], responses[27], responses[28], responses[32], responses[33], responses[35]],
-        "Intellectual": [responses[6], responses[10], responses[11], responses[17], responses[26], responses[29]]
-    }
-
     # Display total score and commentary first
-    total_self_image = sum(responses)
-    st.subheader(f"Total Self-Image Score: {total_self_image}")
-    commentary = get_score_commentary(total_self_image)
-    st.markdown(commentary, unsafe_allow_html=True)
+    st.subheader(f"Total Self-Image Score: {result.total}")
+    st.markdown(SCORE_COMMENTARY[result.band], unsafe_allow_html=True)
     st.markdown("---")
     
     st.write("### Detailed Category Breakdown:")
-    for category_name, cat_responses in categories.items():
-        sentiment, total = analyze_sentiment(cat_responses)
-        
+    for category_name, sentiment, total, quote in result.categories:
+        advice_and_quotes = ADVICE_AND_QUOTES[category_name]
+
         with st.expander(f"**{category_name}**: {sentiment.capitalize()} (Score: {total})", expanded=(sentiment == 'negative')):
-            advice = ADVICE_AND_QUOTES[category_name][sentiment]
-            st.write(f"💡 **Advice**: {advice}")
+            st.write(f"💡 **Advice**: {advice_and_quotes[sentiment]}")
             
             st.markdown("**Motivational Quotes:**")
-            # Show a random quote from the list to keep it fresh
-            quote = random.choice(ADVICE_AND_QUOTES[category_name]["quotes"])
-            st.info(f"_{quote}_")
+            st.info(f"_{advice_and_quotes['quotes'][quote]}_")
 
 
-# --- WORKOUT GENERATION & TRACKING ---
+# --- SAVED PROFILES ---
 
-def generate_workout(split, level, physical_sentiment, goal_type, bodybuilding_goal, sport):
-    """Generates a workout plan based on user inputs and survey sentiment."""
-    base_sets = {"Beginner": 3, "Intermediate": 4, "Advanced": 5}
-    base_reps = {"Beginner": 12, "Intermediate": 8, "Advanced": 6}
-    
-    # Adjust intensity based on the 'Physical' sentiment score from the survey
-    intensity_modifier = {"positive": 1.0, "neutral": 0.8, "negative": 0.6}.get(physical_sentiment, 1.0)
-
-    sets = max(2, int(base_sets[level] * intensity_modifier))
-    reps = max(5, int(base_reps[level] * intensity_modifier))
-
-    # This dictionary is for bodybuilding routines.
-    routines = {
-        "Push-Pull-Legs": {
-            "Variation 1": [{"Day": "Push", "Exercises": [{"Exercise": "Bench Press", "Sets": sets, "Reps": reps, "Rest": "90s", "Focus": "Chest strength"}, {"Exercise": "Overhead Press", "Sets": sets-1, "Reps": reps+2, "Rest": "60s", "Focus": "Shoulders"}, {"Exercise": "Tricep Dips", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Triceps"}]}, {"Day": "Pull", "Exercises": [{"Exercise": "Deadlifts", "Sets": sets, "Reps": reps-2, "Rest": "90s", "Focus": "Back strength"}, {"Exercise": "Pull-Ups", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Lats"}, {"Exercise": "Barbell Rows", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Upper back"}]}, {"Day": "Legs", "Exercises": [{"Exercise": "Squats", "Sets": sets, "Reps": reps, "Rest": "90s", "Focus": "Quads"}, {"Exercise": "Romanian Deadlifts", "Sets": sets-1, "Reps": reps+2, "Rest": "60s", "Focus": "Hamstrings"}, {"Exercise": "Calf Raises", "Sets": sets-1, "Reps": reps+5, "Rest": "45s", "Focus": "Calves"}]}],
-            "Variation 2": [{"Day": "Push", "Exercises": [{"Exercise": "Incline Bench Press", "Sets": sets, "Reps": reps, "Rest": "90s", "Focus": "Upper chest"}, {"Exercise": "Dumbbell Shoulder Press", "Sets": sets-1, "Reps": reps+2, "Rest": "60s", "Focus": "Shoulders"}, {"Exercise": "Skull Crushers", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Triceps"}]}, {"Day": "Pull", "Exercises": [{"Exercise": "Rack Pulls", "Sets": sets, "Reps": reps-2, "Rest": "90s", "Focus": "Lower back"}, {"Exercise": "Chin-Ups", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Lats and biceps"}, {"Exercise": "Dumbbell Rows", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Upper back"}]}, {"Day": "Legs", "Exercises": [{"Exercise": "Front Squats", "Sets": sets, "Reps": reps, "Rest": "90s", "Focus": "Quads and core"}, {"Exercise": "Lunges", "Sets": sets-1, "Reps": reps+2, "Rest": "60s", "Focus": "Glutes and hamstrings"}, {"Exercise": "Seated Calf Raises", "Sets": sets-1, "Reps": reps+5, "Rest": "45s", "Focus": "Calves"}]}]
-        },
-        "Upper-Lower": {
-            "Variation 1": [{"Day": "Upper", "Exercises": [{"Exercise": "Bench Press", "Sets": sets, "Reps": reps, "Rest": "90s", "Focus": "Chest"}, {"Exercise": "Pull-Ups", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Lats"}, {"Exercise": "Overhead Press", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Shoulders"}, {"Exercise": "Barbell Rows", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Upper back"}]}, {"Day": "Lower", "Exercises": [{"Exercise": "Squats", "Sets": sets, "Reps": reps, "Rest": "90s", "Focus": "Quads"}, {"Exercise": "Deadlifts", "Sets": sets, "Reps": reps-2, "Rest": "90s", "Focus": "Hamstrings and back"}, {"Exercise": "Leg Press", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Quads and glutes"}, {"Exercise": "Calf Raises", "Sets": sets-1, "Reps": reps+5, "Rest": "45s", "Focus": "Calves"}]}],
-            "Variation 2": [{"Day": "Upper", "Exercises": [{"Exercise": "Incline Dumbbell Press", "Sets": sets, "Reps": reps, "Rest": "90s", "Focus": "Upper chest"}, {"Exercise": "Chin-Ups", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Lats and biceps"}, {"Exercise": "Arnold Press", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Shoulders"}, {"Exercise": "T-Bar Rows", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Mid-back"}]}, {"Day": "Lower", "Exercises": [{"Exercise": "Bulgarian Split Squats", "Sets": sets, "Reps": reps, "Rest": "60s", "Focus": "Quads and glutes"}, {"Exercise": "Romanian Deadlifts", "Sets": sets, "Reps": reps, "Rest": "90s", "Focus": "Hamstrings"}, {"Exercise": "Leg Extensions", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Quads"}, {"Exercise": "Seated Calf Raises", "Sets": sets-1, "Reps": reps+5, "Rest": "45s", "Focus": "Calves"}]}]
-        },
-        "Bro Split": {
-            "Variation 1": [{"Day": "Chest", "Exercises": [{"Exercise": "Bench Press", "Sets": sets, "Reps": reps, "Rest": "90s", "Focus": "Chest"}, {"Exercise": "Incline Dumbbell Press", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Upper chest"}, {"Exercise": "Cable Flyes", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Chest isolation"}]}, {"Day": "Back", "Exercises": [{"Exercise": "Deadlifts", "Sets": sets, "Reps": reps-2, "Rest": "90s", "Focus": "Back"}, {"Exercise": "Pull-Ups", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Lats"}, {"Exercise": "Barbell Rows", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Upper back"}]}, {"Day": "Arms", "Exercises": [{"Exercise": "Barbell Curls", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Biceps"}, {"Exercise": "Skull Crushers", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Triceps"}, {"Exercise": "Hammer Curls", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Biceps"}]}],
-            "Variation 2": [{"Day": "Chest", "Exercises": [{"Exercise": "Incline Bench Press", "Sets": sets, "Reps": reps, "Rest": "90s", "Focus": "Upper chest"}, {"Exercise": "Dumbbell Flyes", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Chest stretch"}, {"Exercise": "Pec Deck", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Chest isolation"}]}, {"Day": "Back", "Exercises": [{"Exercise": "Rack Pulls", "Sets": sets, "Reps": reps-2, "Rest": "90s", "Focus": "Lower back"}, {"Exercise": "Chin-Ups", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Lats and biceps"}, {"Exercise": "Dumbbell Rows", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Upper back"}]}, {"Day": "Arms", "Exercises": [{"Exercise": "EZ Bar Curls", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Biceps"}, {"Exercise": "Close-Grip Bench Press", "Sets": sets-1, "Reps": reps, "Rest": "60s", "Focus": "Triceps"}, {"Exercise": "Concentration Curls", "Sets": sets-1, "Reps": reps+4, "Rest": "60s", "Focus": "Biceps peak"}]}]
-        }
-    }
-    
-    if goal_type == "Sports":
-        sport_routines = {
-            "Football": {
-                "Variation 1 (Speed & Agility)": [{"Day": "Lower Body Power", "Exercises": [{"Exercise": "Power Cleans", "Sets": sets, "Reps": 3, "Rest": "120s"}, {"Exercise": "Box Jumps", "Sets": sets, "Reps": 5, "Rest": "90s"}, {"Exercise": "Back Squats", "Sets": sets, "Reps": reps, "Rest": "90s"}]}, {"Day": "Upper Body Strength", "Exercises": [{"Exercise": "Bench Press", "Sets": sets, "Reps": reps, "Rest": "90s"}, {"Exercise": "Weighted Pull-Ups", "Sets": sets, "Reps": reps, "Rest": "75s"}, {"Exercise": "Barbell Rows", "Sets": sets-1, "Reps": reps, "Rest": "60s"}]}, {"Day": "Conditioning & Core", "Exercises": [{"Exercise": "Sled Pushes", "Sets": sets, "Reps": "20m", "Rest": "60s"}, {"Exercise": "Agility Ladder Drills", "Sets": sets, "Reps": "60s", "Rest": "60s"}, {"Exercise": "Plank with Reach", "Sets": sets, "Reps": "60s", "Rest": "45s"}]}],
-                "Variation 2 (Strength & Power)": [{"Day": "Full Body Strength", "Exercises": [{"Exercise": "Deadlifts", "Sets": sets, "Reps": reps-2, "Rest": "120s"}, {"Exercise": "Overhead Press", "Sets": sets, "Reps": reps, "Rest": "90s"}, {"Exercise": "Farmer's Walks", "Sets": sets, "Reps": "30m", "Rest": "60s"}]}, {"Day": "Explosive Power", "Exercises": [{"Exercise": "Hang Cleans", "Sets": sets, "Reps": 3, "Rest": "120s"}, {"Exercise": "Medicine Ball Slams", "Sets": sets, "Reps": 8, "Rest": "60s"}, {"Exercise": "Broad Jumps", "Sets": sets, "Reps": 5, "Rest": "90s"}]}, {"Day": "Accessory & Durability", "Exercises": [{"Exercise": "Glute-Ham Raises", "Sets": sets-1, "Reps": reps+2, "Rest": "60s"}, {"Exercise": "Face Pulls", "Sets": sets-1, "Reps": reps+4, "Rest": "45s"}, {"Exercise": "Rotational Cable Chops", "Sets": sets, "Reps": reps+4, "Rest": "45s"}]}]
-            },
-            "Basketball": {
-                "Variation 1 (Vertical Power)": [{"Day": "Plyometrics", "Exercises": [{"Exercise": "Depth Jumps", "Sets": sets, "Reps": 5, "Rest": "120s"}, {"Exercise": "Box Jumps", "Sets": sets, "Reps": 5, "Rest": "90s"}, {"Exercise": "Medicine Ball Slams", "Sets": sets, "Reps": 8, "Rest": "60s"}]}, {"Day": "Strength", "Exercises": [{"Exercise": "Front Squats", "Sets": sets, "Reps": reps, "Rest": "90s"}, {"Exercise": "Pull-Ups", "Sets": sets, "Reps": reps, "Rest": "60s"}, {"Exercise": "Single-Leg Romanian Deadlifts", "Sets": sets-1, "Reps": reps, "Rest": "60s"}]}, {"Day": "Conditioning", "Exercises": [{"Exercise": "Agility Ladder Drills", "Sets": sets, "Reps": "60s", "Rest": "60s"}, {"Exercise": "Battle Ropes", "Sets": sets, "Reps": "30s", "Rest": "45s"}, {"Exercise": "Hanging Leg Raises", "Sets": sets-1, "Reps": reps+4, "Rest": "45s"}]}],
-                "Variation 2 (Agility & Durability)": [{"Day": "Strength & Stability", "Exercises": [{"Exercise": "Bulgarian Split Squats", "Sets": sets, "Reps": reps, "Rest": "60s"}, {"Exercise": "Dumbbell Bench Press", "Sets": sets, "Reps": reps, "Rest": "75s"}, {"Exercise": "Face Pulls", "Sets": sets, "Reps": 15, "Rest": "45s"}]}, {"Day": "Change of Direction", "Exercises": [{"Exercise": "Lateral Lunges", "Sets": sets, "Reps": reps, "Rest": "60s"}, {"Exercise": "Rotational Medicine Ball Throws", "Sets": sets, "Reps": 8, "Rest": "60s"}, {"Exercise": "Cone Drills", "Sets": 5, "Reps": "30s", "Rest": "60s"}]}, {"Day": "Core & Endurance", "Exercises": [{"Exercise": "Stationary Bike Sprints", "Sets": 5, "Reps": "20s", "Rest": "90s"}, {"Exercise": "Pallof Press", "Sets": sets, "Reps": 12, "Rest": "45s"}, {"Exercise": "Side Planks", "Sets": sets, "Reps": "45s per side", "Rest": "30s"}]}]
-            },
-            "Volleyball": {
-                "Variation 1 (Spiking & Blocking)": [{"Day": "Vertical Jump", "Exercises": [{"Exercise": "Jump Squats", "Sets": sets, "Reps": 6, "Rest": "90s"}, {"Exercise": "Box Jumps", "Sets": sets, "Reps": 5, "Rest": "90s"}, {"Exercise": "Depth Jumps", "Sets": sets, "Reps": 5, "Rest": "120s"}]}, {"Day": "Upper Body Power", "Exercises": [{"Exercise": "Push Press", "Sets": sets, "Reps": reps, "Rest": "90s"}, {"Exercise": "Medicine Ball Slams", "Sets": sets, "Reps": 8, "Rest": "60s"}, {"Exercise": "Lat Pulldowns", "Sets": sets, "Reps": reps+2, "Rest": "60s"}]}, {"Day": "Core & Shoulders", "Exercises": [{"Exercise": "Face Pulls", "Sets": sets, "Reps": 15, "Rest": "45s"}, {"Exercise": "Rotational Cable Chops", "Sets": sets, "Reps": 12, "Rest": "60s"}, {"Exercise": "Plank", "Sets": sets, "Reps": "60s", "Rest": "45s"}]}],
-                "Variation 2 (Agility & Injury Prevention)": [{"Day": "Lateral Movement", "Exercises": [{"Exercise": "Lateral Box Jumps", "Sets": sets, "Reps": 6, "Rest": "90s"}, {"Exercise": "Agility Ladder Drills", "Sets": 5, "Reps": "45s", "Rest": "60s"}, {"Exercise": "Lateral Lunges", "Sets": sets, "Reps": reps, "Rest": "60s"}]}, {"Day": "Full Body Strength", "Exercises": [{"Exercise": "Goblet Squats", "Sets": sets, "Reps": reps+2, "Rest": "75s"}, {"Exercise": "Dumbbell Rows", "Sets": sets, "Reps": reps+2, "Rest": "60s"}, {"Exercise": "Single-Leg Glute Bridges", "Sets": sets, "Reps": 15, "Rest": "45s"}]}, {"Day": "Conditioning", "Exercises": [{"Exercise": "Burpees", "Sets": sets, "Reps": 10, "Rest": "60s"}, {"Exercise": "Kettlebell Swings", "Sets": sets, "Reps": 15, "Rest": "60s"}, {"Exercise": "Hanging Knee Raises", "Sets": sets, "Reps": 15, "Rest": "45s"}]}]
-            },
-            "Hockey": {
-                "Variation 1 (Power & Speed)": [{"Day": "Lower Body Power", "Exercises": [{"Exercise": "Barbell Squats", "Sets": sets, "Reps": reps, "Rest": "90s"}, {"Exercise": "Lateral Box Jumps", "Sets": sets, "Reps": 8, "Rest": "90s"}, {"Exercise": "Sled Drags", "Sets": sets, "Reps": "20m", "Rest": "75s"}]}, {"Day": "Upper Body Strength", "Exercises": [{"Exercise": "Bench Press", "Sets": sets, "Reps": reps, "Rest": "90s"}, {"Exercise": "Weighted Chin-Ups", "Sets": sets, "Reps": reps, "Rest": "75s"}, {"Exercise": "Farmer's Walks", "Sets": sets, "Reps": "30m", "Rest": "60s"}]}, {"Day": "Rotational & Core", "Exercises": [{"Exercise": "Rotational Medicine Ball Throws", "Sets": sets, "Reps": 8, "Rest": "60s"}, {"Exercise": "Cable Woodchoppers", "Sets": sets, "Reps": 12, "Rest": "60s"}, {"Exercise": "Ab Rollouts", "Sets": sets, "Reps": 10, "Rest": "60s"}]}],
-                "Variation 2 (Endurance & Stability)": [{"Day": "Leg Endurance", "Exercises": [{"Exercise": "Bulgarian Split Squats", "Sets": sets, "Reps": reps+4, "Rest": "60s"}, {"Exercise": "Walking Lunges", "Sets": sets, "Reps": "20 steps", "Rest": "75s"}, {"Exercise": "Glute-Ham Raises", "Sets": sets, "Reps": 12, "Rest": "60s"}]}, {"Day": "Stability & Control", "Exercises": [{"Exercise": "Single-Arm Dumbbell Press", "Sets": sets, "Reps": reps, "Rest": "60s"}, {"Exercise": "Pallof Press", "Sets": sets, "Reps": 15, "Rest": "45s"}, {"Exercise": "Copenhagen Planks", "Sets": sets, "Reps": "30s per side", "Rest": "30s"}]}, {"Day": "Conditioning", "Exercises": [{"Exercise": "Stationary Bike Intervals", "Sets": 6, "Reps": "30s sprint", "Rest": "60s"}, {"Exercise": "Kettlebell Swings", "Sets": sets, "Reps": 20, "Rest": "60s"}, {"Exercise": "Battle Ropes", "Sets": sets, "Reps": "30s", "Rest": "45s"}]}]
-            },
-            "Cycling": {
-                "Variation 1 (Max Power Output)": [{"Day": "Heavy Strength", "Exercises": [{"Exercise": "Back Squats", "Sets": sets, "Reps": reps, "Rest": "90s"}, {"Exercise": "Deadlifts", "Sets": sets, "Reps": reps-2, "Rest": "120s"}, {"Exercise": "Leg Press", "Sets": sets, "Reps": reps, "Rest": "75s"}]}, {"Day": "Power Development", "Exercises": [{"Exercise": "Kettlebell Swings", "Sets": sets, "Reps": 15, "Rest": "60s"}, {"Exercise": "Box Jumps", "Sets": sets, "Reps": 5, "Rest": "90s"}, {"Exercise": "Weighted Calf Raises", "Sets": sets, "Reps": 12, "Rest": "45s"}]}, {"Day": "Core Stability", "Exercises": [{"Exercise": "Plank", "Sets": 3, "Reps": "Until failure", "Rest": "60s"}, {"Exercise": "Hanging Leg Raises", "Sets": sets, "Reps": 15, "Rest": "45s"}, {"Exercise": "Bird-Dog", "Sets": sets, "Reps": 12, "Rest": "45s"}]}],
-                "Variation 2 (Muscular Endurance)": [{"Day": "High-Rep Strength", "Exercises": [{"Exercise": "Goblet Squats", "Sets": sets, "Reps": 20, "Rest": "60s"}, {"Exercise": "Romanian Deadlifts", "Sets": sets, "Reps": 15, "Rest": "60s"}, {"Exercise": "Leg Extensions", "Sets": sets, "Reps": 15, "Rest": "45s"}]}, {"Day": "Endurance & Core", "Exercises": [{"Exercise": "Bulgarian Split Squats", "Sets": sets, "Reps": 15, "Rest": "60s"}, {"Exercise": "Single-Leg Glute Bridges", "Sets": sets, "Reps": 20, "Rest": "45s"}, {"Exercise": "Side Planks", "Sets": 3, "Reps": "Until failure", "Rest": "45s"}]}, {"Day": "Conditioning", "Exercises": [{"Exercise": "Stationary Bike Sprints", "Sets": 8, "Reps": "20s on, 10s off", "Rest": "2 min rest after 8 reps"}, {"Exercise": "Battle Ropes", "Sets": sets, "Reps": "45s", "Rest": "60s"}, {"Exercise": "Mountain Climbers", "Sets": sets, "Reps": "45s", "Rest": "60s"}]}]
-            },
-            "Cricket": {
-                "Variation 1 (Fast Bowler Focus)": [{"Day": "Power & Strength", "Exercises": [{"Exercise": "Medicine Ball Slams", "Sets": sets, "Reps": 8}, {"Exercise": "Single-Leg Squats", "Sets": sets, "Reps": reps}, {"Exercise": "Lat Pulldowns", "Sets": sets, "Reps": reps+2}]}, {"Day": "Core & Stability", "Exercises": [{"Exercise": "Cable Woodchoppers", "Sets": sets, "Reps": 12}, {"Exercise": "Side Planks", "Sets": sets, "Reps": "45s"}, {"Exercise": "Face Pulls", "Sets": sets, "Reps": 15}]}, {"Day": "Conditioning", "Exercises": [{"Exercise": "Sprint Intervals", "Sets": 6, "Reps": "30m"}, {"Exercise": "Burpees", "Sets": sets, "Reps": 12}]}],
-                "Variation 2 (Batsman Focus)": [{"Day": "Rotational Power", "Exercises": [{"Exercise": "Rotational Medicine Ball Throws", "Sets": sets, "Reps": 8}, {"Exercise": "Kettlebell Swings", "Sets": sets, "Reps": 15}, {"Exercise": "Barbell Rows", "Sets": sets, "Reps": reps}]}, {"Day": "Legs & Wrists", "Exercises": [{"Exercise": "Front Squats", "Sets": sets, "Reps": reps}, {"Exercise": "Farmer's Walks", "Sets": sets, "Reps": "30m"}, {"Exercise": "Wrist Curls", "Sets": sets, "Reps": 15}]}, {"Day": "Agility", "Exercises": [{"Exercise": "Agility Ladder Drills", "Sets": 5, "Reps": "45s"}, {"Exercise": "Cone Drills", "Sets": 5, "Reps": "30s"}]}]
-            },
-            "Tennis": {
-                "Variation 1 (Power & Agility)": [{"Day": "Lower Body Power & Core", "Exercises": [{"Exercise": "Medicine Ball Rotational Throws", "Sets": sets, "Reps": 8, "Rest": "60s"}, {"Exercise": "Box Jumps", "Sets": sets, "Reps": 5, "Rest": "90s"}, {"Exercise": "Lateral Lunges", "Sets": sets-1, "Reps": reps, "Rest": "60s"}]}, {"Day": "Upper Body Strength", "Exercises": [{"Exercise": "Dumbbell Bench Press", "Sets": sets, "Reps": reps, "Rest": "75s"}, {"Exercise": "Cable Woodchoppers", "Sets": sets, "Reps": 12, "Rest": "60s"}, {"Exercise": "Face Pulls", "Sets": sets, "Reps": 15, "Rest": "45s"}]}, {"Day": "Conditioning", "Exercises": [{"Exercise": "Agility Ladder Drills", "Sets": 5, "Reps": "45s", "Rest": "60s"}, {"Exercise": "Sprint Intervals (20m)", "Sets": 6, "Reps": "1 rep", "Rest": "75s"}, {"Exercise": "Jump Rope", "Sets": 3, "Reps": "3 minutes", "Rest": "60s"}]}],
-                "Variation 2 (Endurance & Injury Prevention)": [{"Day": "Full Body Endurance", "Exercises": [{"Exercise": "Goblet Squats", "Sets": sets, "Reps": 15, "Rest": "60s"}, {"Exercise": "Single-Arm Dumbbell Rows", "Sets": sets, "Reps": 12, "Rest": "60s"}, {"Exercise": "Walking Lunges", "Sets": sets, "Reps": "20 steps", "Rest": "75s"}]}, {"Day": "Shoulder & Core Stability", "Exercises": [{"Exercise": "Pallof Press", "Sets": sets, "Reps": 12, "Rest": "45s"}, {"Exercise": "External Rotations (Band)", "Sets": sets, "Reps": 15, "Rest": "45s"}, {"Exercise": "Plank with Shoulder Taps", "Sets": sets, "Reps": "60s", "Rest": "60s"}]}, {"Day": "Low-Impact Conditioning", "Exercises": [{"Exercise": "Stationary Bike", "Sets": 1, "Reps": "20 minutes HIIT", "Rest": "N/A"}, {"Exercise": "Kettlebell Swings", "Sets": sets, "Reps": 20, "Rest": "60s"}, {"Exercise": "Bird-Dog", "Sets": sets, "Reps": 12, "Rest": "45s"}]}]
-            },
-            "Running": {
-                "Variation 1 (Strength for Speed)": [{"Day": "Full Body Strength A", "Exercises": [{"Exercise": "Barbell Squats", "Sets": sets, "Reps": reps, "Rest": "90s"}, {"Exercise": "Romanian Deadlifts", "Sets": sets, "Reps": reps, "Rest": "75s"}, {"Exercise": "Weighted Calf Raises", "Sets": sets, "Reps": 15, "Rest": "45s"}]}, {"Day": "Full Body Strength B", "Exercises": [{"Exercise": "Walking Lunges", "Sets": sets, "Reps": reps, "Rest": "75s"}, {"Exercise": "Single-Leg Glute Bridges", "Sets": sets, "Reps": 12, "Rest": "60s"}, {"Exercise": "Pull-Ups (or Lat Pulldowns)", "Sets": sets, "Reps": reps, "Rest": "60s"}]}, {"Day": "Plyometrics & Core", "Exercises": [{"Exercise": "Box Jumps", "Sets": sets, "Reps": 5, "Rest": "90s"}, {"Exercise": "A-Skips", "Sets": sets, "Reps": "20m", "Rest": "60s"}, {"Exercise": "Hanging Knee Raises", "Sets": sets, "Reps": 15, "Rest": "45s"}]}],
-                "Variation 2 (Injury Prevention & Endurance)": [{"Day": "Unilateral Strength", "Exercises": [{"Exercise": "Bulgarian Split Squats", "Sets": sets, "Reps": reps+2, "Rest": "60s"}, {"Exercise": "Single-Leg Romanian Deadlifts", "Sets": sets, "Reps": reps, "Rest": "60s"}, {"Exercise": "Single-Leg Calf Raises", "Sets": sets, "Reps": 15, "Rest": "45s"}]}, {"Day": "Hip & Core Stability", "Exercises": [{"Exercise": "Banded Lateral Walks", "Sets": 3, "Reps": "15 steps each way", "Rest": "60s"}, {"Exercise": "Bird-Dog", "Sets": sets, "Reps": 12, "Rest": "45s"}, {"Exercise": "Side Planks", "Sets": sets, "Reps": "45s per side", "Rest": "30s"}]}, {"Day": "Conditioning", "Exercises": [{"Exercise": "Kettlebell Swings", "Sets": sets, "Reps": 20, "Rest": "60s"}, {"Exercise": "Jump Rope", "Sets": 3, "Reps": "3 minutes", "Rest": "60s"}, {"Exercise": "Mountain Climbers", "Sets": sets, "Reps": "45s", "Rest": "60s"}]}]
-            }
+# Streamlit re-executes this script on every rerun, so process-wide objects
+# defined here must live in st.cache_resource rather than module globals.
+@st.cache_resource(show_spinner=False)
+def get_profile_store():
+    """Returns the process-wide profile store shared by all sessions."""
+    return ProfileStore()
+
+def save_survey(user, responses):
+    """
+    Scores a completed survey and picks its quotes once, with this session's ID as the seed,
+    then saves the result with the user's profile and puts it in the session.
+    """
+    scores = score_survey(responses)
+    result = survey_result(responses, st.session_state.session_id, scores)
+    sentiment = scores.categories["Physical"].sentiment
+    get_profile_store().save(user, "survey", {
+        "responses": list(responses),
+        "physical_sentiment": sentiment,
+        "total": scores.total,
+        "categories": scores.categories,
+        "band": result.band,
+        "quotes": [category.quote for category in result.categories]
+    })
+    st.session_state.physical_sentiment = sentiment
+    st.session_state.survey_result = result
+
+def _saved_survey_result(survey):
+    """Rebuilds the SurveyResult of a saved survey; surveys saved before quotes were stored get new ones."""
+    if "quotes" not in survey:
+        return survey_result(survey["responses"], st.session_state.session_id)
+    return SurveyResult(survey["total"], survey["band"], tuple(
+        CategoryResult(name, sentiment, score, quote)
+        for (name, (sentiment, score)), quote in zip(survey["categories"].items(), survey["quotes"])
+    ))
+
+def resume_profile(user):
+    """
+    Restores a saved profile into the session and jumps to the results page, or to the survey
+    if it was never finished. Returns False if the user has no saved profile.
+    The name is the only key, so this does not check who is asking.
+    """
+    store = get_profile_store()
+    user_data = store.load(user, "user_data")
+    if user_data is None:
+        return False
+    # Strings loaded from JSON are new objects; interned, every session shares one copy
+    st.session_state.user_data = intern_strings(user_data)
+    st.session_state.step = 'results'
+    if user_data.get("take_survey"):
+        survey = store.load(user, "survey")
+        if survey is None:
+            st.session_state.step = 'survey'
+        else:
+            survey = intern_strings(survey)
+            st.session_state.physical_sentiment = survey["physical_sentiment"]
+            st.session_state.survey_result = _saved_survey_result(survey)
+    st.session_state.pop('input_stage', None)
+    st.session_state.pop('form_data', None)
+    # Keeps the user in the URL so a browser refresh resumes the same profile
+    st.query_params["user"] = user
+    return True
+
+
+# --- WORKOUT TRACKING ---
+
+def user_plan_key():
+    """Returns the plan catalog key for the current session's inputs and survey sentiment."""
+    user_data = st.session_state.user_data
+    return plan_key(
+        user_data["split"],
+        user_data["level"],
+        st.session_state.get('physical_sentiment'),
+        user_data.get("goal_type"),
+        user_data.get("bodybuilding_goal"),
+        user_data.get("sport")
+    )
+
+LOG_PAGE_SIZE = 20
+
+@st.cache_resource(show_spinner=False)
+def get_log_store():
+    """Returns the process-wide workout log store shared by all sessions."""
+    return LogStore()
+
+def _planned_exercises(plan, workout_day):
+    """Returns the exercises of the first day with this name across the plan's variations."""
+    for days in plan.values():
+        for day in days:
+            if day.name == workout_day:
+                return day.exercises
+    return ()
+
+def _optional_int(value):
+    # Blank editor cells come back as None (or NaN when pandas is involved)
+    return None if value is None or value != value else int(value)
+
+def _optional_float(value):
+    return None if value is None or value != value else float(value)
+
+def render_progress_summary(stats, day_options):
+    """Shows completion, streak and adherence figures from the running log stats."""
+    st.subheader("📈 Your Progress")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Workouts Logged", stats.total)
+    c2.metric("Completion Rate", f"{stats.completion_rate():.0%}")
+    c3.metric("Current Streak", stats.current_streak)
+    c4.metric("Best Streak", stats.best_streak)
+
+    days_since = stats.days_since_trained()
+    st.dataframe([
+        {
+            "Workout Day": day,
+            "Completion Rate": f"{rate:.0%}" if (rate := stats.completion_rate(day)) is not None else "–",
+            "Days Since Last Trained": days_since.get(day, "–")
         }
-        return sport_routines.get(sport, {})
-
-    elif goal_type == "Bodybuilding":
-        plan = routines[split]
-        for variation_days in plan.values():
-            for day in variation_days:
-                for exercise in day["Exercises"]:
-                    if bodybuilding_goal == "Weight Loss":
-                        exercise["Reps"] = max(1, exercise.get("Reps", reps) + 2)
-                        exercise["Rest"] = "45-60s"
-                        exercise["Focus"] += " | Goal: Fat loss"
-                    elif bodybuilding_goal == "Weight Gain":
-                        exercise["Sets"] = max(1, exercise.get("Sets", sets) + 1)
-                        exercise["Rest"] = "75-90s"
-                        exercise["Focus"] += " | Goal: Muscle gain"
-        return plan
-
-    return routines.get(split, {})
+        for day in dict.fromkeys([*day_options, *stats.day_totals])
+    ], use_container_width=True)
+
+    adherence = stats.weekly_adherence(len(day_options))
+    if adherence:
+        st.caption(f"Weekly adherence (target: {len(day_options)} sessions per week)")
+        st.bar_chart(
+            {"Week": [week for week, _, _ in adherence], "Adherence": [share for _, _, share in adherence]},
+            x="Week", y="Adherence"
+        )
+
+def render_log_transfer(store, user):
+    """CSV export of the user's log and import of history from other trackers, both streamed in batches."""
+    with st.expander("⇅ Import / Export"):
+        if st.button("Export my log as CSV"):
+            buffer = io.StringIO()
+            write_csv(buffer, LOG_COLUMNS, log_rows(store, user))
+            st.download_button("Download CSV", buffer.getvalue(), file_name=f"{user}_workouts.csv", mime="text/csv")
+
+        uploaded = st.file_uploader(
+            "Import workout history (CSV with date, workout_day, completed, notes, exercise, sets, reps, load columns)",
+            type=["csv"]
+        )
+        if uploaded is not None and st.button("Import"):
+            try:
+                count = import_logs(store, read_csv(io.TextIOWrapper(uploaded, encoding="utf-8-sig", newline="")), user=user)
+            except (KeyError, ValueError, csv.Error) as error:
+                st.error(f"Could not import this file, so no workouts were imported: {error}")
+            else:
+                st.success(f"Imported {count} workouts.")
 
+@timed("workout_tracker")
 def workout_tracker():
     """Renders the UI for logging and viewing workout sessions."""
-    if 'workout_logs' not in st.session_state:
-        st.session_state.workout_logs = []
+    store = get_log_store()
+    user_data = st.session_state.user_data
+    user = user_data.get("name", "User")
+    # Sports plans store the chosen sport as the split identifier
+    split = user_data.get("sport") if user_data.get("goal_type") == "Sports" else user_data.get("split")
+    day_options = workout_day_options(split)
 
     with st.expander("📝 Log a New Workout", expanded=True):
+        # Chosen outside the form so the exercise table below follows the selected day
+        workout_day = st.selectbox("Workout Day", day_options)
+        planned = _planned_exercises(get_plan(user_plan_key()), workout_day)
+
         with st.form("tracker_form"):
-            user_data = st.session_state.user_data
-            goal_type = user_data.get("goal_type")
-            split = user_data.get("split")
-            
-            day_options = []
-            if goal_type == "Sports":
-                # Dynamically get day names from the generated workout plan
-                sport_plan = generate_workout(None, user_data.get("level"), "neutral", "Sports", None, user_data.get("sport"))
-                if sport_plan:
-                    # Get day names from the first variation
-                    first_variation = list(sport_plan.values())[0]
-                    day_options = [day['Day'] for day in first_variation]
-            elif split == "Push-Pull-Legs":
-                day_options = ["Push", "Pull", "Legs"]
-            elif split == "Upper-Lower":
-                day_options = ["Upper", "Lower"]
-            elif split == "Bro Split":
-                day_options = ["Chest", "Back", "Arms"]
-            else: # Fallback
-                day_options = ["Day 1", "Day 2", "Day 3"]
-
-
-            c1, c2, c3 = st.columns(3)
+            c1, c2 = st.columns(2)
             date = c1.date_input("Date", datetime.date.today())
-            workout_day = c2.selectbox("Workout Day", day_options)
-            completed = c3.checkbox("Completed?", value=True)
+            completed = c2.checkbox("Completed?", value=True)
+
+            performed = st.data_editor(
+                [
+                    {
+                        "Exercise": ex.name,
+                        "Sets": ex.sets if isinstance(ex.sets, int) else None,
+                        "Reps": ex.reps if isinstance(ex.reps, int) else None,
+                        "Load (kg)": None
+                    }
+                    for ex in planned
+                ],
+                column_config={
+                    "Sets": st.column_config.NumberColumn(min_value=0, max_value=MAX_COUNT, step=1),
+                    "Reps": st.column_config.NumberColumn(min_value=0, max_value=MAX_COUNT, step=1),
+                    "Load (kg)": st.column_config.NumberColumn(min_value=0.0, step=0.5)
+                },
+                disabled=["Exercise"], use_container_width=True, key=f"tracker_sets_{workout_day}"
+            ) if planned else []
             
-            notes = st.text_area("Notes (e.g., weights used, how you felt)", height=100)
+            notes = st.text_area("Notes (e.g., how you felt)", height=100)
             
             if st.form_submit_button("Log Workout", use_container_width=True):
-                st.session_state.workout_logs.append({
-                    "Date": date.strftime("%Y-%m-%d"),
-                    "Workout Day": workout_day,
-                    "Completed": "✅" if completed else "❌",
-                    "Notes": notes
-                })
-                st.success("Workout logged successfully!")
-
-    if st.session_state.workout_logs:
+                try:
+                    store.append(user, LogEntry(
+                        date, workout_day, completed, notes,
+                        tuple(
+                            SetRecord(row["Exercise"], _optional_int(row["Sets"]), _optional_int(row["Reps"]), _optional_float(row["Load (kg)"]))
+                            for row in performed
+                        )
+                    ))
+                except ValueError as error:
+                    st.error(f"Could not log this workout: {error}")
+                else:
+                    st.success("Workout logged successfully!")
+
+    render_log_transfer(store, user)
+
+    stats = store.stats(user)
+    total = stats.total
+    if total:
+        render_progress_summary(stats, day_options)
+
         st.subheader("📋 Your Workout Log History")
-        st.dataframe(st.session_state.workout_logs, use_container_width=True)
+        # Only the requested page is read from the store and sent to the browser
+        page_count = (total + LOG_PAGE_SIZE - 1) // LOG_PAGE_SIZE
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+        st.dataframe([format_entry(e) for e in store.page(user, page - 1, LOG_PAGE_SIZE)], use_container_width=True)
+        st.caption(f"{total} workouts logged")
     else:
         st.info("No workouts logged yet. Fill out the form above to get started!")
 
 
 # --- PAGE RENDERING FUNCTIONS ---
 
+# Number of (plan key, variation) blocks kept pre-rendered; least recently used are evicted.
+PLAN_RENDER_CACHE_SIZE = 256
+
+def _format_day(day):
+    """Formats all exercises of a day as one markdown block."""
+    lines = []
+    for ex in day.exercises:
+        # Handle cases where Reps might be a string (e.g., "20m")
+        reps_display = ex.reps if ex.reps is not None else 'N/A'
+        sets_display = ex.sets if ex.sets is not None else 'N/A'
+        rest_display = ex.rest or '60s'
+        lines.append(f"- **{ex.name}**: {sets_display} sets × {reps_display} reps (Rest: {rest_display})")
+        if ex.focus: # Only show focus if it exists
+            lines.append(f"  <br><small>Focus: {ex.focus}</small>")
+    return "\n".join(lines)
+
+@st.cache_resource(max_entries=PLAN_RENDER_CACHE_SIZE, show_spinner=False)
+def render_variation(key, variation, adjustments=None):
+    """
+    Returns a (title, markdown) pair per day of a plan variation, rendered once per process.
+    Progression adjustments are part of the cache key, so users with the same history share an entry.
+    """
+    days = get_plan(key)[variation]
+    if adjustments:
+        days = [progress_day(day, adjustments) for day in days]
+    return tuple((f"**{day.name} Day**", _format_day(day)) for day in days)
+
+@st.cache_resource(max_entries=PLAN_RENDER_CACHE_SIZE, show_spinner=False)
+def render_week(program, number):
+    """Returns a (title, markdown) pair per day of one week of a periodized program, rendered once per process."""
+    return tuple((f"**{day.name} Day**", _format_day(day)) for day in program_week(program, number).days)
+
+def render_periodized_program(key):
+    """Shows a multi-week program one week at a time; only the selected week is built and rendered."""
+    c1, c2 = st.columns(2)
+    weeks = c1.slider("Program Length (weeks):", MIN_WEEKS, MAX_WEEKS, DEFAULT_WEEKS)
+    model = c2.selectbox("Progression:", list(PROGRESSION_MODELS), help="Linear adds load every week; undulating alternates heavier and lighter weeks.")
+    program = make_program(key, weeks, model)
+
+    labels = {
+        week.number: f"Week {week.number} – " + ("Deload" if week.deload else week.variation)
+        for week in schedule(program)
+    }
+    number = st.selectbox("Week:", list(labels), format_func=labels.get)
+    if program_week(program, number).deload:
+        st.info("Deload week: fewer sets and longer rest to recover before the next block.")
+    for title, body in render_week(program, number):
+        with st.expander(title, expanded=True):
+            st.markdown(body, unsafe_allow_html=True)
+
+    if st.button("Export program as CSV"):
+        buffer = io.StringIO()
+        write_csv(buffer, PROGRAM_COLUMNS, program_rows(program))
+        st.download_button("Download CSV", buffer.getvalue(), file_name=f"program_{weeks}_weeks.csv", mime="text/csv")
+
+def _render_custom_days(plan):
+    (days,) = plan.values()
+    return tuple((f"**{day.name} Day** (~{estimate_minutes(day)} min)", _format_day(day)) for day in days)
+
+@st.cache_resource(max_entries=PLAN_RENDER_CACHE_SIZE, show_spinner=False)
+def _render_complete_custom_plan(constraints):
+    # Raises PlanCutShort for a plan the time limit reduced, so only complete plans are cached
+    return _render_custom_days(complete_plan(constraints))
+
+def render_custom_plan(constraints):
+    """
+    Returns a (title, markdown) pair per day of a custom plan, built and rendered once per set of constraints.
+    A plan cut short by the build time limit is rendered as is but not cached, so a later rerun can complete it.
+    """
+    try:
+        return _render_complete_custom_plan(constraints)
+    except PlanCutShort as cut_short:
+        return _render_custom_days(cut_short.plan)
+
+def render_custom_builder():
+    """Composes a plan from the user's own constraints instead of a fixed split or sport."""
+    user_data = st.session_state.user_data
+    index = load_exercise_index()
+    c1, c2 = st.columns(2)
+    days = c1.slider("Days per Week:", MIN_DAYS, MAX_DAYS, 3)
+    minutes = c2.slider("Minutes per Session:", MIN_MINUTES, MAX_MINUTES, 45, step=5)
+    equipment = st.multiselect("Available Equipment:", index.equipment(), help="Leave empty for bodyweight exercises only.")
+    muscles = st.multiselect("Target Muscles:", sorted(index.by_muscle))
+    exclude = st.multiselect("Exclude Exercises:", sorted(index.names))
+    constraints = make_constraints(
+        days, minutes, equipment, muscles, exclude, user_data.get("level", LEVELS[0]),
+        st.session_state.get('physical_sentiment') or "positive"
+    )
+    try:
+        rendered = render_custom_plan(constraints)
+    except ValueError as error:
+        st.warning(str(error))
+        return
+    for title, body in rendered:
+        with st.expander(title, expanded=True):
+            st.markdown(body, unsafe_allow_html=True)
+
+@timed("render_user_input_form")
 def render_user_input_form():
     """Displays the multi-step form for collecting user data."""
     st.header("Step 1: Your Details")
+    with st.expander("Returning user? Pick up where you left off"):
+        st.caption("Profiles are saved under your name without a password, so anyone who enters the same name can open yours.")
+        with st.form("resume_profile"):
+            returning_name = st.text_input("Name used last time:")
+            if st.form_submit_button("Resume", use_container_width=True):
+                if returning_name and resume_profile(returning_name):
+                    st.rerun()
+                else:
+                    st.warning("No saved profile found for that name.")
+
     with st.form("user_input_basic"):
         name = st.text_input("Name:")
         age = st.number_input("Age:", min_value=1, max_value=100, step=1)
         gender = st.selectbox("Gender:", ["Female", "Male", "Other"])
-        goal_type = st.selectbox("Primary Goal:", ["Bodybuilding", "Sports"], help="Choose your main training objective.")
+        goal_type = st.selectbox("Primary Goal:", GOAL_TYPES, help="Choose your main training objective.")
         
         take_survey = st.radio("Would you like to take a mental checkup survey to tailor your plan?", ["Yes", "No"], index=1)
+        replace_profile = st.checkbox("Replace my saved profile if this name already has one")
         
         if st.form_submit_button("Next →", use_container_width=True):
-            if name and age:
+            if name and age and not replace_profile and get_profile_store().sections(name):
+                # Only guards against reusing a name by accident: names are not secret, and Resume
+                # or ?user=<name> opens any profile and its workout log
+                st.warning(
+                    f"A saved profile already uses the name {name!r}. Resume it above, choose another name, "
+                    "or tick the box to replace it (its workout log is kept)."
+                )
+            elif name and age:
                 st.session_state.form_data = {
                     "name": name, "age": age, "gender": gender,
                     "goal_type": goal_type,
@@ -401,6 +481,7 @@ def render_user_input_form():
             else:
                 st.warning("Please fill in your Name and Age.")
 
+@timed("render_details_form")
 def render_details_form():
     """Displays the second part of the user input form."""
     st.header("Step 2: Your Plan")
@@ -413,16 +494,13 @@ def render_details_form():
 
         # Conditionally show options based on the selected goal
         if form_data.get("goal_type") == "Bodybuilding":
-            bodybuilding_goal = st.selectbox("Bodybuilding Focus:", ["Weight Loss", "Weight Gain"], index=1, help="Target cutting or bulking.")
-            split = st.selectbox("Workout Split:", ["Push-Pull-Legs", "Upper-Lower", "Bro Split"])
+            bodybuilding_goal = st.selectbox("Bodybuilding Focus:", BODYBUILDING_GOALS, index=1, help="Target cutting or bulking.")
+            split = st.selectbox("Workout Split:", SPLITS)
         else:
-            sport = st.selectbox("Sport:", [
-                "Football", "Basketball", "Volleyball", "Hockey", "Cycling", 
-                "Cricket", "Tennis", "Running"
-            ], help="Select the sport you want a plan for.")
+            sport = st.selectbox("Sport:", SPORTS, help="Select the sport you want a plan for.")
             split = sport # Use the chosen sport as the 'split' identifier
         
-        level = st.selectbox("Fitness Level:", ["Beginner", "Intermediate", "Advanced"])
+        level = st.selectbox("Fitness Level:", LEVELS)
 
         c1, c2 = st.columns(2)
         if c1.form_submit_button("← Back", use_container_width=True):
@@ -435,19 +513,23 @@ def render_details_form():
                 st.error("Please go back and select a primary goal.")
                 return
 
-            st.session_state.user_data = {
+            st.session_state.user_data = intern_strings({
                 **form_data,
                 "split": split,
                 "level": level,
                 "bodybuilding_goal": bodybuilding_goal,
                 "sport": sport # Add the chosen sport to the final user data
-            }
+            })
+            # A survey saved for the old profile must not be resumed with the new one
+            get_profile_store().save(form_data["name"], "user_data", st.session_state.user_data, invalidate=("survey",))
+            st.query_params["user"] = form_data["name"]
             # Decide the next step based on survey choice
             st.session_state.step = 'survey' if form_data.get("take_survey") else 'results'
             del st.session_state.input_stage
             del st.session_state.form_data
             st.rerun()
 
+@timed("render_survey_page")
 def render_survey_page():
     """A dedicated page for the user to complete the survey."""
     st.header("🧠 Mental Checkup Survey")
@@ -457,19 +539,16 @@ def render_survey_page():
     responses = run_chatbot()
     
     if responses is not None:
-        # Survey is complete, now process the results
-        st.session_state.survey_responses = responses
-        
-        # Specifically find the physical sentiment to adjust the workout
-        physical_responses = [responses[1], responses[2], responses[8], responses[19], responses[21], responses[25]]
-        sentiment, _ = analyze_sentiment(physical_responses)
-        st.session_state.physical_sentiment = sentiment
+        # Survey is complete: score it once and save it, including the physical
+        # sentiment that adjusts the workout, so a returning user skips the survey
+        save_survey(st.session_state.user_data.get("name", "User"), responses)
         
         # Move to the final results page
         st.session_state.step = 'results'
         st.balloons()
         st.rerun()
 
+@timed("render_results_page")
 def render_results_page():
     """Displays the main results page with tabs for Workouts, Logs, and Mental Health."""
     user_data = st.session_state.user_data
@@ -487,34 +566,35 @@ def render_results_page():
         if sentiment:
             st.info(f"Your plan's intensity has been adjusted based on your **{sentiment}** physical self-perception.")
         
-        workouts = generate_workout(
-            user_data["split"],
-            user_data["level"],
-            sentiment,
-            user_data.get("goal_type"),
-            user_data.get("bodybuilding_goal"),
-            user_data.get("sport")
-        )
+        key = user_plan_key()
+        with measure("generate_workout"):
+            workouts = get_plan(key)
+        # Week-over-week adjustments from the user's logged sessions
+        adjustments = get_log_store().progression(user_data.get("name", "User")).adjustments()
+        if not any(adjustments):
+            adjustments = None
+        elif adjustments.steps:
+            st.info("Sets, reps and rest have been progressed based on your logged workouts.")
         
         st.subheader(f"Your Personalised Plan for {user_data.get('split')}")
-        
-        variation_names = list(workouts.keys())
-        chosen_variation = st.selectbox("Select a Plan Variation:", variation_names)
-        
-        if chosen_variation and workouts[chosen_variation]:
-            for day in workouts[chosen_variation]:
-                with st.expander(f"**{day['Day']} Day**", expanded=True):
-                    for ex in day["Exercises"]:
-                        # Handle cases where Reps might be a string (e.g., "20m")
-                        reps_display = ex.get('Reps', 'N/A')
-                        sets_display = ex.get('Sets', 'N/A')
-                        rest_display = ex.get('Rest', '60s')
-                        
-                        st.write(f"• **{ex['Exercise']}**: {sets_display} sets × {reps_display} reps (Rest: {rest_display})")
-                        if 'Focus' in ex: # Only show caption if Focus exists
-                            st.caption(f"  Focus: {ex['Focus']}")
-        else:
+
+        program_type = st.radio("Program Type:", ["Single Week", "Periodized", "Custom"], horizontal=True)
+        if program_type == "Custom":
+            render_custom_builder()
+        elif not workouts:
             st.warning("Could not generate a workout plan with the selected options.")
+        elif program_type == "Periodized":
+            render_periodized_program(key)
+        else:
+            variation_names = list(workouts.keys())
+            chosen_variation = st.selectbox("Select a Plan Variation:", variation_names)
+
+            if chosen_variation and workouts[chosen_variation]:
+                for title, body in render_variation(key, chosen_variation, adjustments):
+                    with st.expander(title, expanded=True):
+                        st.markdown(body, unsafe_allow_html=True)
+            else:
+                st.warning("Could not generate a workout plan with the selected options.")
 
 
     with logs_tab:
@@ -522,26 +602,55 @@ def render_results_page():
 
     if user_data.get("take_survey") and mental_health_tab:
         with mental_health_tab[0]:
-            if 'survey_responses' in st.session_state:
-                display_survey_results(st.session_state.survey_responses)
+            if 'survey_result' in st.session_state:
+                display_survey_results(st.session_state.survey_result)
             else:
                 st.warning("Survey results not found. Please complete the survey.")
     
     if st.button("Start Over"):
+        # The saved profile is kept; the user can resume it from the first form
         st.session_state.clear()
+        st.query_params.clear()
         st.rerun()
 
 
 # --- MAIN APPLICATION LOGIC ---
 
+def render_debug_panel():
+    """Sidebar panel with this session's stage timings and export buttons. Only shown when profiling is on."""
+    with st.sidebar.expander("⏱️ Profiling", expanded=False):
+        st.caption("Latency per stage for this session (seconds)")
+        st.dataframe(profiling.RECORDER.summary(st.session_state.session_id), use_container_width=True)
+        if st.checkbox("Show all sessions"):
+            st.dataframe(profiling.RECORDER.summary(), use_container_width=True)
+        st.caption(f"Plan cache: {plan_cache_info()}")
+        if st.button("Export profile (JSON lines)"):
+            count = profiling.RECORDER.export_jsonl("profile.jsonl")
+            st.success(f"Wrote {count} measurements to profile.jsonl")
+        if st.button("Export profile (Prometheus)"):
+            profiling.RECORDER.export_prometheus("profile.prom")
+            st.success("Wrote profile.prom")
+
+@st.cache_resource(show_spinner=False)
+def _prewarm_plans():
+    """Fills the shared plan cache once per process, on the first rerun after startup."""
+    return prewarm_plan_cache()
+
 def main():
     """Main function to run the Streamlit app."""
     st.set_page_config(page_title="Personalized Workout Generator", layout="wide")
+    _prewarm_plans()
     st.title(" Personalized Workout Generator")
     st.write("Create a workout plan tailored to your goals and track your progress.")
     st.markdown("---")
 
     # Initialize session state variables
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    profiling.current_session.set(st.session_state.session_id)
+    if 'step' not in st.session_state and "user" in st.query_params:
+        # A refreshed page starts with an empty session; restore it from the saved profile
+        resume_profile(st.query_params["user"])
     if 'step' not in st.session_state:
         st.session_state.step = 'input'
     if 'input_stage' not in st.session_state:
@@ -549,6 +658,9 @@ def main():
     if 'form_data' not in st.session_state:
         st.session_state.form_data = {}
 
+    # Page handling this rerun, for the per-page session state sizes recorded when profiling
+    page = f"input_{st.session_state.input_stage}" if st.session_state.step == 'input' else st.session_state.step
+
     # Simple state machine to control the app flow
     if st.session_state.step == 'input':
         if st.session_state.input_stage == 'basic':
@@ -560,6 +672,10 @@ def main():
     elif st.session_state.step == 'results':
         render_results_page()
 
+    if profiling.ENABLED:
+        profiling.record_state(page, dict(st.session_state))
+        render_debug_panel()
+
 if __name__ == "__main__":
     main()
 
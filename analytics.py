@@ -0,0 +1,79 @@
+"""
+Running workout-log aggregates that are updated per entry instead of rescanning history.
+"""
+import datetime
+import json
+
+
+class LogStats:
+    """
+    Aggregates over one user's log: per-day completion, completed sessions per ISO week,
+    session streaks and the last date each day type was trained.
+    add() is O(1); entries are expected roughly in the order they are logged.
+    """
+
+    __slots__ = ("total", "completed", "day_totals", "weekly", "last_trained", "current_streak", "best_streak")
+
+    def __init__(self):
+        self.total = 0
+        self.completed = 0
+        # workout day -> [logged, completed]
+        self.day_totals = {}
+        # "YYYY-Www" -> completed sessions that week
+        self.weekly = {}
+        # workout day -> latest "YYYY-MM-DD" with a completed session
+        self.last_trained = {}
+        # Consecutive completed sessions; a logged miss resets the current streak
+        self.current_streak = 0
+        self.best_streak = 0
+
+    def add(self, date, workout_day, completed, notes="", exercises=()):
+        """Folds one log entry (date as "YYYY-MM-DD") into the aggregates. Notes and exercises are not used."""
+        self.total += 1
+        counts = self.day_totals.setdefault(workout_day, [0, 0])
+        counts[0] += 1
+        if not completed:
+            self.current_streak = 0
+            return
+        self.completed += 1
+        counts[1] += 1
+        year, week, _ = datetime.date.fromisoformat(date).isocalendar()
+        week_key = f"{year}-W{week:02d}"
+        self.weekly[week_key] = self.weekly.get(week_key, 0) + 1
+        if date > self.last_trained.get(workout_day, ""):
+            self.last_trained[workout_day] = date
+        self.current_streak += 1
+        self.best_streak = max(self.best_streak, self.current_streak)
+
+    def completion_rate(self, workout_day=None):
+        """Share of logged sessions marked completed, overall or for one workout day; None if nothing logged."""
+        if workout_day is None:
+            logged, completed = self.total, self.completed
+        else:
+            logged, completed = self.day_totals.get(workout_day, (0, 0))
+        return completed / logged if logged else None
+
+    def weekly_adherence(self, sessions_per_week):
+        """Returns [(week, completed, adherence)] in week order, with adherence capped at 1.0."""
+        return [
+            (week, count, min(1.0, count / sessions_per_week) if sessions_per_week else None)
+            for week, count in sorted(self.weekly.items())
+        ]
+
+    def days_since_trained(self, today=None):
+        """Returns {workout day: days since its last completed session}."""
+        today = today or datetime.date.today()
+        return {
+            day: (today - datetime.date.fromisoformat(date)).days
+            for day, date in self.last_trained.items()
+        }
+
+    def to_json(self):
+        return json.dumps({name: getattr(self, name) for name in self.__slots__}, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        stats = cls()
+        for name, value in json.loads(text).items():
+            setattr(stats, name, value)
+        return stats
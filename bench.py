@@ -0,0 +1,254 @@
+"""
+Headless benchmarks for plan generation, survey scoring, log storage and app reruns.
+
+    python bench.py --save baseline.json
+    python bench.py --compare baseline.json --threshold 0.2
+
+Each timing metric is the best per-call time in seconds over several repeats; state.*
+metrics are the session_state bytes a page leaves behind. With --compare
+the run exits with status 1 if any metric is slower than the baseline by more than the threshold.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import timeit
+from unittest import mock
+
+import engine
+from log_store import LogStore
+from profiling import deep_sizeof
+from workout_log import LogEntry, SetRecord
+
+
+DEFAULT_LOG_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.2
+REPEAT = 5
+
+
+def _best(func, number=1, repeat=REPEAT):
+    """Best per-call time of func in seconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def _random_responses(rng, count):
+    return [[rng.randint(1, 5) for _ in engine.QUESTIONS] for _ in range(count)]
+
+
+# --- PLAN GENERATION ---
+
+def bench_plans():
+    keys = list(engine.all_plan_keys())
+
+    def cold():
+        engine.get_plan.cache_clear()
+        engine._base_plan.cache_clear()
+        engine.prewarm_plan_cache()
+
+    def warm():
+        for goal_type, split_or_sport, level, sentiment, bodybuilding_goal in keys:
+            if goal_type == "Sports":
+                engine.generate_workout(None, level, sentiment, goal_type, None, split_or_sport)
+            else:
+                engine.generate_workout(split_or_sport, level, sentiment, goal_type, bodybuilding_goal, None)
+
+    cold()
+    return {
+        "plans.cold_build_all": _best(cold),
+        "plans.warm_lookup_all": _best(warm, number=10),
+        "plans.combinations": len(keys),
+    }
+
+
+# --- SURVEY SCORING ---
+
+def bench_survey(rng, bulk_size=10_000):
+    single = _random_responses(rng, 1)[0]
+    bulk = _random_responses(rng, bulk_size)
+    results = {
+        "survey.score_single": _best(lambda: engine.score_survey(single), number=1000),
+        "survey.score_loop_10k": _best(lambda: [engine.score_survey(r) for r in bulk], repeat=3),
+    }
+    try:
+        import numpy as np
+        from bulk_scoring import score_responses
+    except ImportError:
+        print("numpy not available, skipping vectorized survey scoring", file=sys.stderr)
+        return results
+    matrix = np.asarray(bulk, dtype=np.int32)
+    results["survey.score_bulk_10k"] = _best(lambda: score_responses(matrix))
+    return results
+
+
+# --- LOG STORAGE ---
+
+def _log_entries(rng, count, start=datetime.date(2015, 1, 1)):
+    days = engine.workout_day_options("Push-Pull-Legs")
+    for i in range(count):
+        yield LogEntry(
+            start + datetime.timedelta(days=i // 2),
+            days[i % len(days)],
+            rng.random() < 0.8,
+            "Felt strong" if i % 3 == 0 else "",
+            (SetRecord("Bench Press", 3, 8, 60.0 + i % 10), SetRecord("Pull-Ups", 3, 10, None))
+        )
+
+def bench_logs(rng, sizes, workdir):
+    results = {}
+    for size in sizes:
+        store = LogStore(os.path.join(workdir, f"logs_{size}.db"))
+        entries = _log_entries(rng, size)
+        start = timeit.default_timer()
+        while True:
+            chunk = [entry for _, entry in zip(range(10_000), entries)]
+            if not chunk:
+                break
+            store.bulk_append("bench", chunk)
+        results[f"logs.{size}.bulk_append_per_entry"] = (timeit.default_timer() - start) / size
+        results[f"logs.{size}.append_one"] = _best(
+            lambda: store.append("bench", LogEntry(datetime.date(2030, 1, 1), "Push", True)),
+            number=50
+        )
+        results[f"logs.{size}.count"] = _best(lambda: store.count("bench"), number=10)
+        results[f"logs.{size}.first_page"] = _best(lambda: store.page("bench", 0, 20), number=50)
+        results[f"logs.{size}.day_range_query"] = _best(
+            lambda: store.query("bench", start="2016-01-01", end="2016-03-31", workout_day="Pull"), number=20
+        )
+        results[f"logs.{size}.load_columns_year"] = _best(
+            lambda: store.columns("bench", start="2016-01-01", end="2016-12-31"), repeat=3
+        )
+        store.close()
+    return results
+
+
+# --- APP RERUNS ---
+
+class _SessionState(dict):
+    """Attribute-style dict like st.session_state."""
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+def _mock_streamlit():
+    """A stand-in streamlit module: widgets return their defaults and buttons are never pressed."""
+    st = mock.MagicMock(name="streamlit")
+    st.session_state = _SessionState()
+    st.query_params = {}
+    st.cache_resource = lambda *args, **kwargs: args[0] if args and callable(args[0]) else (lambda f: f)
+    st.cache_data = st.cache_resource
+    # Columns and tabs behave like the top-level module so their widgets return defaults too
+    st.columns.side_effect = lambda spec, **kwargs: [st] * (spec if isinstance(spec, int) else len(spec))
+    st.tabs.side_effect = lambda names: [st] * len(names)
+    st.selectbox.side_effect = lambda label, options, index=0, **kwargs: list(options)[index] if options else None
+    st.number_input.side_effect = lambda label, min_value=None, max_value=None, value=None, **kwargs: value if value is not None else min_value
+    st.slider.side_effect = lambda label, min_value=None, max_value=None, value=None, **kwargs: value if value is not None else min_value
+    st.radio.side_effect = lambda label, options, index=0, **kwargs: None if index is None else list(options)[index]
+    st.text_input.return_value = ""
+    st.text_area.return_value = ""
+    st.multiselect.return_value = []
+    st.checkbox.return_value = False
+    st.button.return_value = False
+    st.form_submit_button.return_value = False
+    st.date_input.side_effect = lambda label, value=None, **kwargs: value
+    return st
+
+def bench_reruns(rng, workdir):
+    st = _mock_streamlit()
+    sys.modules["streamlit"] = st
+    sys.modules.pop("TF21", None)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import TF21
+        user_data = {
+            "name": "Bench", "age": 30, "gender": "Other", "goal_type": "Bodybuilding", "take_survey": True,
+            "split": "Push-Pull-Legs", "level": "Intermediate", "bodybuilding_goal": "Weight Gain", "sport": None
+        }
+        responses = _random_responses(rng, 1)[0]
+        pages = {
+            "input_basic": {"step": "input", "input_stage": "basic", "form_data": {}},
+            "input_details": {"step": "input", "input_stage": "details", "form_data": dict(user_data)},
+            "survey": {"step": "survey", "user_data": user_data, "survey_state": {"responses": bytearray(responses[:12]), "current_question": 12}},
+            "results": {
+                "step": "results", "user_data": user_data, "survey_result": engine.survey_result(responses, seed=0),
+                "physical_sentiment": engine.get_physical_sentiment(responses)
+            },
+        }
+        results = {}
+        for name, state in pages.items():
+            def rerun():
+                st.session_state.clear()
+                st.session_state.update(state)
+                TF21.main()
+            results[f"reruns.{name}"] = _best(rerun, number=20)
+            results[f"state.{name}_bytes"] = deep_sizeof(dict(st.session_state))
+        return results
+    finally:
+        os.chdir(cwd)
+        sys.modules.pop("TF21", None)
+        sys.modules.pop("streamlit", None)
+
+
+# --- RESULTS ---
+
+def compare(results, baseline, threshold):
+    """Returns (metric, old, new, ratio) for every timing that regressed beyond the threshold."""
+    regressions = []
+    for name, old in baseline.get("metrics", {}).items():
+        new = results["metrics"].get(name)
+        if new is None or not old or name.endswith(".combinations"):
+            continue
+        ratio = new / old
+        if ratio > 1 + threshold:
+            regressions.append((name, old, new, ratio))
+    return regressions
+
+def run(sizes, seed=0):
+    rng = random.Random(seed)
+    metrics = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        metrics.update(bench_plans())
+        metrics.update(bench_survey(rng))
+        metrics.update(bench_logs(rng, sizes, workdir))
+        metrics.update(bench_reruns(rng, workdir))
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": metrics,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the FiTech benchmark suite.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_LOG_SIZES), help="Log store sizes to benchmark.")
+    parser.add_argument("--quick", action="store_true", help="Only benchmark the smallest log size.")
+    parser.add_argument("--save", metavar="PATH", help="Write results as JSON.")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline JSON from an earlier --save.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown ratio, e.g. 0.2 for 20%%.")
+    args = parser.parse_args(argv)
+
+    sizes = [min(args.sizes)] if args.quick else args.sizes
+    results = run(sizes)
+    for name, value in results["metrics"].items():
+        print(f"{name:45s} {value:.6g}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, old, new, ratio in regressions:
+            print(f"REGRESSION {name}: {old:.6g} -> {new:.6g} ({ratio:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
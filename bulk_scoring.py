@@ -0,0 +1,48 @@
+"""
+Vectorized survey scoring for many respondents at once.
+Uses the same category mapping and thresholds as engine.score_survey.
+"""
+import collections
+
+import numpy as np
+
+from engine import CATEGORY_QUESTIONS, MAX_ANSWER, MIN_ANSWER, NEUTRAL_CATEGORY_SCORE, QUESTIONS, SCORE_BAND_LIMITS
+
+
+CATEGORIES = tuple(CATEGORY_QUESTIONS)
+SENTIMENTS = np.array(["negative", "neutral", "positive"])
+
+def _category_matrix():
+    """Builds the 36 x 6 matrix with a 1 where a question counts towards a category."""
+    matrix = np.zeros((len(QUESTIONS), len(CATEGORIES)), dtype=np.int32)
+    for column, category_name in enumerate(CATEGORIES):
+        matrix[list(CATEGORY_QUESTIONS[category_name]), column] = 1
+    return matrix
+
+CATEGORY_MATRIX = _category_matrix()
+
+BulkScores = collections.namedtuple("BulkScores", ["category_sums", "sentiments", "totals", "bands"])
+
+def score_responses(responses):
+    """
+    Scores an N x 36 array of survey answers in one pass.
+    Returns BulkScores with N x 6 category sums and sentiments (columns in CATEGORIES
+    order), N totals, and N indices into engine.SCORE_BANDS.
+    """
+    responses = np.asarray(responses)
+    if responses.ndim == 1:
+        responses = responses[np.newaxis, :]
+    if responses.ndim != 2 or responses.shape[1] != len(QUESTIONS):
+        raise ValueError(f"Expected an N x {len(QUESTIONS)} response array, got shape {responses.shape}")
+    # Casting floats or strings to int32 would truncate or garble them silently
+    if responses.size and responses.dtype.kind not in "iu":
+        raise ValueError(f"Survey answers must be whole numbers {MIN_ANSWER}-{MAX_ANSWER}, got dtype {responses.dtype}")
+    if responses.size and (responses.min() < MIN_ANSWER or responses.max() > MAX_ANSWER):
+        raise ValueError(f"Survey answers must be {MIN_ANSWER}-{MAX_ANSWER}")
+    responses = responses.astype(np.int32, copy=False)
+
+    category_sums = responses @ CATEGORY_MATRIX
+    sentiments = SENTIMENTS[np.sign(category_sums - NEUTRAL_CATEGORY_SCORE) + 1]
+    totals = responses.sum(axis=1)
+    bands = np.searchsorted(SCORE_BAND_LIMITS, totals, side="left")
+    return BulkScores(category_sums, sentiments, totals, bands)
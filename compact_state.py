@@ -0,0 +1,33 @@
+"""
+Compact forms of per-session data. Streamlit holds every session's st.session_state in server
+memory until the session ends, so survey answers are packed one byte each and strings that
+repeat across sessions are interned.
+"""
+import sys
+
+from engine import MAX_ANSWER, MIN_ANSWER, QUESTIONS
+
+
+def pack_responses(responses):
+    """
+    Returns survey answers as bytes, one byte per answer. The result indexes, sums and
+    iterates like the list of ints it replaces; list(packed) gives the list back.
+    """
+    packed = bytes(responses)
+    if len(packed) != len(QUESTIONS):
+        raise ValueError(f"Expected {len(QUESTIONS)} survey responses, got {len(packed)}")
+    if min(packed) < MIN_ANSWER or max(packed) > MAX_ANSWER:
+        raise ValueError(f"Survey answers must be {MIN_ANSWER}-{MAX_ANSWER}")
+    return packed
+
+def intern_strings(value):
+    """Returns value with every string in it, including those in nested dicts, lists and tuples, interned."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {intern_strings(k): intern_strings(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [intern_strings(v) for v in value]
+    if type(value) is tuple:
+        return tuple(intern_strings(v) for v in value)
+    return value
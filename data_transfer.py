@@ -0,0 +1,338 @@
+"""
+Streaming CSV and Parquet import/export of workout logs, generated plans and survey scores.
+
+    python data_transfer.py export-logs alice logs.parquet
+    python data_transfer.py export-plans plans.csv
+    python data_transfer.py export-program program.csv --split Push-Pull-Legs --level Beginner --weeks 12 --model Undulating
+    python data_transfer.py export-surveys surveys.csv
+    python data_transfer.py import-logs history.csv --user alice --column date=Date --date-format %d/%m/%Y
+
+Rows flow through in batches of at most batch_size, so memory use does not grow with the
+size of the history. An import is written in one transaction, so a bad row anywhere in
+the file leaves the store unchanged. Parquet support needs pyarrow, which is imported only when used.
+"""
+import argparse
+import csv
+import datetime
+import itertools
+import sys
+
+import engine
+from log_store import LogStore
+from periodization import DEFAULT_WEEKS, PROGRESSION_MODELS, iter_weeks, make_program
+from profile_store import ProfileStore
+from workout_log import COMPLETED_FLAGS, LogEntry, SetRecord, check_entry
+
+
+DEFAULT_BATCH_SIZE = 5000
+
+# (column, type) per dataset; types are "date", "string", "bool", "int" and "float".
+# Logs are written one row per exercise, with the entry fields repeated; an entry
+# without exercises is a single row with empty exercise columns.
+LOG_COLUMNS = (
+    ("user", "string"), ("date", "date"), ("workout_day", "string"), ("completed", "bool"), ("notes", "string"),
+    ("exercise", "string"), ("sets", "int"), ("reps", "int"), ("load", "float"),
+)
+# Plan sets/reps can be display strings such as "20m", so they are exported as text.
+PLAN_COLUMNS = (
+    ("goal_type", "string"), ("split", "string"), ("level", "string"), ("sentiment", "string"),
+    ("bodybuilding_goal", "string"), ("variation", "string"), ("day", "string"), ("position", "int"),
+    ("exercise", "string"), ("sets", "string"), ("reps", "string"), ("rest", "string"), ("focus", "string"),
+)
+PROGRAM_COLUMNS = (
+    ("week", "int"), ("variation", "string"), ("deload", "bool"), ("day", "string"), ("position", "int"),
+    ("exercise", "string"), ("sets", "string"), ("reps", "string"), ("rest", "string"), ("focus", "string"),
+)
+SURVEY_COLUMNS = (
+    ("user", "string"), ("total", "int"), ("category", "string"), ("sentiment", "string"), ("score", "int"),
+)
+
+_TRUE_VALUES = {"1", "true", "yes", "y", "done", "completed", COMPLETED_FLAGS[True]}
+_FALSE_VALUES = {"0", "false", "no", "n", "missed", "skipped", COMPLETED_FLAGS[False]}
+
+
+# --- ROW SOURCES ---
+
+def log_rows(store, user, batch_size=DEFAULT_BATCH_SIZE):
+    """Yields a user's log as flat rows, oldest first."""
+    for batch in store.iter_batches(user, batch_size):
+        for entry in batch:
+            base = {"user": user, "date": entry.date, "workout_day": entry.workout_day,
+                    "completed": entry.completed, "notes": entry.notes}
+            if not entry.exercises:
+                yield base
+            for record in entry.exercises:
+                yield {**base, **record._asdict()}
+
+def _exercise_rows(days):
+    for day in days:
+        for position, ex in enumerate(day.exercises):
+            yield {
+                "day": day.name, "position": position, "exercise": ex.name,
+                "sets": None if ex.sets is None else str(ex.sets),
+                "reps": None if ex.reps is None else str(ex.reps),
+                "rest": ex.rest, "focus": ex.focus
+            }
+
+def plan_rows(keys=None):
+    """Yields every exercise of the given plan catalog keys (all plans by default) as flat rows."""
+    for key in engine.all_plan_keys() if keys is None else keys:
+        goal_type, split, level, sentiment, bodybuilding_goal = key
+        for variation, days in engine.get_plan(key).items():
+            for row in _exercise_rows(days):
+                yield {
+                    "goal_type": goal_type, "split": split, "level": level, "sentiment": sentiment,
+                    "bodybuilding_goal": bodybuilding_goal, "variation": variation, **row
+                }
+
+def program_rows(program):
+    """Yields every exercise of a periodized program, week by week, as flat rows."""
+    for week in iter_weeks(program):
+        for row in _exercise_rows(week.days):
+            yield {"week": week.number, "variation": week.variation, "deload": week.deload, **row}
+
+def survey_rows(profiles, batch_size=1000):
+    """Yields one row per survey category for every user with saved survey results."""
+    for user, survey in profiles.iter_section("survey", batch_size):
+        for category, (sentiment, score) in survey["categories"].items():
+            yield {"user": user, "total": survey["total"], "category": category, "sentiment": sentiment, "score": score}
+
+
+# --- WRITERS ---
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value.isoformat() if isinstance(value, datetime.date) else value
+
+def write_csv(path_or_file, columns, rows):
+    """Writes rows (dicts) to a CSV file (path or open text file) as they are produced. Returns the number of rows."""
+    if not hasattr(path_or_file, "write"):
+        with open(path_or_file, "w", newline="", encoding="utf-8") as f:
+            return write_csv(f, columns, rows)
+    names = [name for name, _ in columns]
+    writer = csv.writer(path_or_file)
+    writer.writerow(names)
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(row.get(name)) for name in names])
+        count += 1
+    return count
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+    types = {"date": pa.date32(), "string": pa.string(), "bool": pa.bool_(), "int": pa.int64(), "float": pa.float64()}
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+def write_parquet(path, columns, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Writes rows (dicts) to a Parquet file, one row group per batch. Returns the number of rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = _arrow_schema(columns)
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in _batches(rows, batch_size):
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+def write_rows(path, columns, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Writes rows as Parquet if the path ends in .parquet, otherwise as CSV."""
+    if path.endswith(".parquet"):
+        return write_parquet(path, columns, rows, batch_size)
+    return write_csv(path, columns, rows)
+
+
+# --- READERS ---
+
+def read_csv(path_or_file):
+    """Yields the rows of a CSV file (path or open text file) as dicts, one line at a time."""
+    if hasattr(path_or_file, "read"):
+        yield from csv.DictReader(path_or_file)
+        return
+    with open(path_or_file, newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+def read_parquet(path_or_file, batch_size=DEFAULT_BATCH_SIZE):
+    """Yields the rows of a Parquet file as dicts, reading batch_size rows at a time."""
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path_or_file).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+def read_rows(path, batch_size=DEFAULT_BATCH_SIZE):
+    """Reads a .parquet file with read_parquet and anything else with read_csv."""
+    if path.endswith(".parquet"):
+        return read_parquet(path, batch_size)
+    return read_csv(path)
+
+
+# --- IMPORT ---
+
+def _blank(value):
+    return value is None or value == "" or value != value
+
+def _parse_date(value, date_format):
+    if _blank(value) or not str(value).strip():
+        raise ValueError("Every row needs a date")
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    value = str(value).strip()
+    if date_format:
+        return datetime.datetime.strptime(value, date_format).date()
+    # ISO dates, with or without a time part
+    return datetime.date.fromisoformat(value[:10])
+
+def _parse_completed(value):
+    if _blank(value):
+        return True
+    if isinstance(value, (bool, int)):
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    raise ValueError(f"Unrecognized completion value {value!r}")
+
+def _parse_number(value, kind):
+    if _blank(value):
+        return None
+    number = float(value)
+    if kind is int:
+        if not number.is_integer():
+            raise ValueError(f"Expected a whole number, got {value!r}")
+        return int(number)
+    return number
+
+def parse_log_rows(rows, columns=None, date_format=None, user=None):
+    """
+    Groups flat rows into (user, LogEntry) pairs. Consecutive rows with the same user, date,
+    workout day, completion and notes form one entry; each row with an exercise adds a SetRecord.
+    columns maps this module's column names to the source's headers, e.g. {"date": "Workout Date"},
+    for importing exports of other trackers. A user argument overrides the user column.
+    """
+    columns = columns or {}
+    get = lambda row, name: row.get(columns.get(name, name))
+
+    def key(row):
+        return (
+            user if user is not None else get(row, "user"),
+            _parse_date(get(row, "date"), date_format),
+            str(get(row, "workout_day") or "").strip(),
+            _parse_completed(get(row, "completed")),
+            "" if _blank(notes := get(row, "notes")) else str(notes)
+        )
+
+    for (row_user, date, workout_day, completed, notes), group in itertools.groupby(rows, key=key):
+        if _blank(row_user):
+            raise ValueError("Imported rows need a user column or an explicit user")
+        if not workout_day:
+            raise ValueError(f"Row dated {date} has no workout day")
+        records = tuple(
+            SetRecord(
+                str(get(row, "exercise")).strip(), _parse_number(get(row, "sets"), int),
+                _parse_number(get(row, "reps"), int), _parse_number(get(row, "load"), float)
+            )
+            for row in group if not _blank(get(row, "exercise"))
+        )
+        entry = LogEntry(date, workout_day, completed, notes, records)
+        check_entry(entry)
+        yield row_user, entry
+
+def import_logs(store, rows, columns=None, date_format=None, user=None):
+    """
+    Parses log rows and appends them to the store as they stream in, all in one transaction:
+    a bad row anywhere in the file raises and leaves the store unchanged. Rows may be in any
+    date order. Returns the number of entries written.
+    """
+    return store.import_entries(parse_log_rows(rows, columns, date_format, user))
+
+
+# --- COMMAND LINE ---
+
+def _column_pair(pair):
+    """argparse type for --column: parses NAME=HEADER into (name, header)."""
+    name, _, header = pair.partition("=")
+    if not header:
+        raise argparse.ArgumentTypeError(f"expected NAME=HEADER, got {pair!r}")
+    if name not in dict(LOG_COLUMNS):
+        raise argparse.ArgumentTypeError(f"unknown column {name!r}, expected one of {', '.join(dict(LOG_COLUMNS))}")
+    return name, header
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import and export FiTech data as CSV or Parquet.")
+    parser.add_argument("--db", default="fitech.db", help="SQLite database of the app.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per batch.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_logs = commands.add_parser("export-logs", help="Export one user's workout log.")
+    export_logs.add_argument("user")
+    export_logs.add_argument("path")
+    export_plans = commands.add_parser("export-plans", help="Export every generated plan.")
+    export_plans.add_argument("path")
+    export_program = commands.add_parser("export-program", help="Export a periodized program for one set of inputs.")
+    export_program.add_argument("path")
+    program_source = export_program.add_mutually_exclusive_group(required=True)
+    program_source.add_argument("--split", choices=engine.SPLITS, help="Bodybuilding split.")
+    program_source.add_argument("--sport", choices=engine.SPORTS, help="Sport, instead of a split.")
+    export_program.add_argument("--level", default=engine.LEVELS[0], choices=engine.LEVELS)
+    export_program.add_argument("--sentiment", default="positive", choices=list(engine.INTENSITY_MODIFIERS),
+                                help="Physical self-perception from the survey.")
+    export_program.add_argument("--goal", default=None, choices=engine.BODYBUILDING_GOALS, help="Bodybuilding focus.")
+    export_program.add_argument("--weeks", type=int, default=DEFAULT_WEEKS)
+    export_program.add_argument("--model", default="Linear", choices=list(PROGRESSION_MODELS))
+    export_surveys = commands.add_parser("export-surveys", help="Export per-category survey scores of all users.")
+    export_surveys.add_argument("path")
+    import_parser = commands.add_parser("import-logs", help="Import workout logs from CSV or Parquet.")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--user", help="Import every row for this user instead of reading a user column.")
+    import_parser.add_argument("--column", action="append", type=_column_pair, metavar="NAME=HEADER",
+                               help="Source header for one of: " + ", ".join(name for name, _ in LOG_COLUMNS))
+    import_parser.add_argument("--date-format", help="strptime format of the date column; ISO dates by default.")
+    args = parser.parse_args(argv)
+
+    if args.command == "export-plans":
+        count = write_rows(args.path, PLAN_COLUMNS, plan_rows(), args.batch_size)
+    elif args.command == "export-program":
+        goal_type = "Sports" if args.sport else "Bodybuilding"
+        key = engine.plan_key(args.split, args.level, args.sentiment, goal_type, args.goal, args.sport)
+        if not engine.get_plan(key):
+            sys.exit(f"export-program: the exercise library has no plan for {args.split or args.sport}")
+        try:
+            program = make_program(key, args.weeks, args.model)
+        except ValueError as error:
+            export_program.error(str(error))
+        count = write_rows(args.path, PROGRAM_COLUMNS, program_rows(program), args.batch_size)
+    elif args.command == "export-surveys":
+        profiles = ProfileStore(args.db)
+        count = write_rows(args.path, SURVEY_COLUMNS, survey_rows(profiles), args.batch_size)
+        profiles.close()
+    else:
+        store = LogStore(args.db)
+        try:
+            if args.command == "export-logs":
+                count = write_rows(args.path, LOG_COLUMNS, log_rows(store, args.user, args.batch_size), args.batch_size)
+            else:
+                try:
+                    count = import_logs(
+                        store, read_rows(args.path, args.batch_size), dict(args.column or ()), args.date_format, args.user
+                    )
+                except (ValueError, csv.Error) as error:
+                    # Imports are all-or-nothing, so the store is unchanged
+                    sys.exit(f"import-logs: nothing imported: {error}")
+        finally:
+            store.close()
+    print(f"{args.command}: {count} {'entries' if args.command == 'import-logs' else 'rows'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,484 @@
+"""
+Headless core of the workout generator: survey scoring and plan generation.
+Nothing here imports Streamlit, so it can be used from batch jobs and workers.
+"""
+import bisect
+import collections
+import functools
+import json
+import random
+import sys
+from types import MappingProxyType
+
+from exercise_library import load_program, program_names, resolve_amount
+from profiling import timed
+
+
+# --- CONSTANTS ---
+
+# Splits and sports come from the exercise library index, so adding a program needs no code change.
+SPLITS = program_names("Bodybuilding")
+SPORTS = program_names("Sports")
+GOAL_TYPES = ["Bodybuilding", "Sports"]
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+BODYBUILDING_GOALS = ["Weight Loss", "Weight Gain"]
+
+# Centralizing questions makes the chatbot function cleaner.
+QUESTIONS = [
+    "1. Do your friends come to you for advice?",
+    "2. What do you think about your appearance?",
+    "3. How do you find yourself in doing physical work?",
+    "4. How do you find your temperament?",
+    "5. How do you like school studies?",
+    "6. Do you believe in religious customs and traditions?",
+    "7. Do you participate in criticizing others?",
+    "8. Do you express your ideas frankly in the presence of others?",
+    "9. How do you like your complexion?",
+    "10. Do you think of yourself as cheerful?",
+    "11. Do you behave abnormally also?",
+    "12. Do you think yourself an experienced person?",
+    "13. Do you think about your teachers?",
+    "14. Do you think yourself to be a cool-tempered person?",
+    "15. Are you regular in doing your homework assignments?",
+    "16. Do you insult others?",
+    "17. Do you have difficulty in understanding something when the teacher explains it in class?",
+    "18. Do you think if you get an opportunity you can discover something new?",
+    "19. Do you feel irritated if somebody finds fault with your work?",
+    "20. How do you find your personality?",
+    "21. How do you like the company of others?",
+    "22. How much are you satisfied with your weight?",
+    "23. Do you feel irritated while you face petty difficulties?",
+    "24. How much are you satisfied with the present position of your studies in class?",
+    "25. How do you like school examinations?",
+    "26. How is your voice?",
+    "27. Do you take care of the merits and demerits of a work before doing it?",
+    "28. Where do you place yourself while speaking truth?",
+    "29. Where do you place yourself in obeying public rules?",
+    "30. Are you more intelligent than your colleagues?",
+    "31. Do you take part in organizing it when your classmates go to a picnic?",
+    "32. What will you do if you are doing some important work and your friends ask you to accompany them for a walk?",
+    "33. While taking an examination you are not able to answer some questions and a book of the same subject is lying near you, will you take help of the book?",
+    "34. If you get an opportunity to drink water in the house of so-called low-caste persons, what will you do?",
+    "35. Do you hesitate in mixing with persons of the opposite sex?",
+    "36. You are standing in the bus queue for a long time when the bus comes, the conductor takes some passengers and stops at your turn because there is no space in the bus, what will you do?"
+]
+
+# Storing advice and quotes in a central dictionary improves organization.
+ADVICE_AND_QUOTES = {
+    "Physical": {
+        "negative": "Start with light activities like walking or yoga to build confidence in your physical abilities.",
+        "neutral": "You're doing well physically; try adding variety like resistance training to keep progressing.",
+        "positive": "Awesome physical confidence! Keep pushing your limits with challenging workouts.",
+        "quotes": [
+            "The body achieves what the mind believes.",
+            "Strength does not come from physical capacity. It comes from an indomitable will. - Mahatma Gandhi",
+            "Take care of your body. It's the only place you have to live. - Jim Rohn"
+        ]
+    },
+    "Social": {
+        "negative": "Join a group activity or fitness class to boost social confidence.",
+        "neutral": "Your social skills are solid; try initiating conversations to build stronger connections.",
+        "positive": "You're a social star! Keep fostering those relationships.",
+        "quotes": [
+            "The greatest glory in living lies not in never falling, but in rising every time we fall. - Nelson Mandela",
+            "Surround yourself with only people who are going to lift you higher. - Oprah Winfrey",
+            "Friendship is born at that moment when one person says to another: 'What! You too? I thought I was the only one.' - C.S. Lewis"
+        ]
+    },
+    "Temperamental": {
+        "negative": "Practice deep breathing or meditation to manage stress and improve your temperament.",
+        "neutral": "Your temperament is balanced; mindfulness can help maintain that calm.",
+        "positive": "Your cool-headedness is inspiring! Keep it up.",
+        "quotes": [
+            "Patience is not the ability to wait, but the ability to keep a good attitude while waiting.",
+            "He who controls others may be powerful, but he who has mastered himself is mightier still. - Lao Tzu",
+            "The greatest remedy for anger is delay. - Seneca"
+        ]
+    },
+    "Educational": {
+        "negative": "Set small, achievable study goals to boost your confidence in learning.",
+        "neutral": "You're on a good path educationally; try new study techniques to enhance progress.",
+        "positive": "Your love for learning is fantastic! Keep exploring new knowledge.",
+        "quotes": [
+            "Education is the most powerful weapon which you can use to change the world. - Nelson Mandela",
+            "The beautiful thing about learning is that no one can take it away from you. - B.B. King",
+            "An investment in knowledge pays the best interest. - Benjamin Franklin"
+        ]
+    },
+    "Moral": {
+        "negative": "Reflect on your core values to guide your actions more consistently.",
+        "neutral": "Your moral compass is steady; keep making ethical choices.",
+        "positive": "Your integrity shines! Continue being a role model.",
+        "quotes": [
+            "Integrity is doing the right thing, even when no one is watching. - C.S. Lewis",
+            "The time is always right to do what is right. - Martin Luther King Jr.",
+            "Honesty is the first chapter in the book of wisdom. - Thomas Jefferson"
+        ]
+    },
+    "Intellectual": {
+        "negative": "Stimulate your mind with puzzles, books, or new skills to boost intellectual confidence.",
+        "neutral": "Your intellectual curiosity is great; challenge yourself with complex problems.",
+        "positive": "Your intellect is thriving! Keep exploring new ideas.",
+        "quotes": [
+            "The mind is not a vessel to be filled but a fire to be kindled. - Plutarch",
+            "Intelligence is the ability to adapt to change. - Stephen Hawking",
+            "The true sign of intelligence is not knowledge but imagination. - Albert Einstein"
+        ]
+    }
+}
+
+# Zero-based question indices that make up each survey category.
+CATEGORY_QUESTIONS = {
+    "Physical": (1, 2, 8, 19, 21, 25),
+    "Social": (0, 7, 20, 30, 31, 34),
+    "Temperamental": (3, 9, 13, 15, 18, 22),
+    "Educational": (4, 12, 14, 16, 23, 24),
+    "Moral": (5, 27, 28, 32, 33, 35),
+    "Intellectual": (6, 10, 11, 17, 26, 29)
+}
+
+# Survey answers are on a 1-5 scale.
+MIN_ANSWER = 1
+MAX_ANSWER = 5
+# A category sum below this is negative, equal to it neutral and above it positive.
+NEUTRAL_CATEGORY_SCORE = 18
+# Inclusive upper limits of the total self-image score bands; higher scores fall in the last band.
+SCORE_BAND_LIMITS = (64, 93, 122, 151)
+SCORE_BANDS = ("Needs Attention", "Room for Growth", "Balanced Perspective", "Confident Outlook", "Very High Self-Esteem")
+# Commentary per score band: (background color, text). Shown above the category breakdown.
+_BAND_COMMENTARY = (
+    ("#FFD2D2", "Your score suggests you may be experiencing a period of significant self-doubt across several areas. It's important to acknowledge these feelings without judgment. This is a starting point for growth. Consider focusing on small, achievable goals in one area, like taking a short walk each day (Physical) or reaching out to one friend (Social), to begin building momentum. Remember to be kind to yourself during this process."),
+    ("#FFE9D2", "Your responses indicate some areas of confidence mixed with others where you feel less secure. This is quite common. Try to identify the specific areas where you feel less positive and explore the reasons behind them. The advice in the sections above can provide targeted strategies. Celebrating small wins can be a powerful way to start shifting your overall perspective."),
+    ("#D2EFFF", "You seem to have a generally balanced self-view, with a solid foundation of self-esteem. You likely have areas where you feel strong and others you'd like to improve, which is a healthy and realistic outlook. Continue to nurture your strengths while exploring the targeted advice for areas you wish to develop further."),
+    ("#D2FFD8", "You have a strong and positive self-image. You are likely confident in your abilities and decisions, navigating challenges with a resilient mindset. Keep fostering this positive self-perception by continuing to engage in activities that align with your values and challenge you in healthy ways. Your positive outlook can be an inspiration to others."),
+    ("#E6D2FF", "Your score reflects a very high level of self-confidence and self-acceptance. You have a clear understanding of your strengths and value yourself highly. This is a fantastic asset. Continue to leverage this self-assurance to pursue your goals and uplift those around you. Ensure this confidence is paired with an openness to feedback for continuous growth."),
+)
+# The HTML of each band is built once; results pages only look it up.
+SCORE_COMMENTARY = tuple(
+    f'<div style="background-color: {color}; padding: 10px; border-radius: 5px;">'
+    f"<strong>{band}:</strong> {text}</div>"
+    for band, (color, text) in zip(SCORE_BANDS, _BAND_COMMENTARY)
+)
+
+
+# --- SURVEY ANALYSIS ---
+
+def analyze_sentiment(category_responses):
+    """Calculates the sentiment based on the sum of responses for a category."""
+    category_sum = sum(category_responses)
+    if category_sum < NEUTRAL_CATEGORY_SCORE:
+        return "negative", category_sum
+    elif category_sum == NEUTRAL_CATEGORY_SCORE:
+        return "neutral", category_sum
+    else:
+        return "positive", category_sum
+
+def get_score_commentary(score):
+    """Provides a detailed comment, as HTML, based on the total self-image score."""
+    return SCORE_COMMENTARY[score_band(score)]
+
+def score_band(score):
+    """Returns the index into SCORE_BANDS for a total self-image score."""
+    return bisect.bisect_left(SCORE_BAND_LIMITS, score)
+
+CategoryScore = collections.namedtuple("CategoryScore", ["sentiment", "score"])
+SurveyScores = collections.namedtuple("SurveyScores", ["total", "categories"])
+
+def score_survey(responses):
+    """
+    Scores a full set of 36 survey answers.
+    Returns the total self-image score and a CategoryScore per category, in display order.
+    """
+    if len(responses) != len(QUESTIONS):
+        raise ValueError(f"Expected {len(QUESTIONS)} survey responses, got {len(responses)}")
+    # Packed answers (bytes) are ints by construction
+    if not isinstance(responses, (bytes, bytearray)) and not all(
+        isinstance(answer, int) and not isinstance(answer, bool) for answer in responses
+    ):
+        raise ValueError(f"Survey answers must be whole numbers {MIN_ANSWER}-{MAX_ANSWER}")
+    if min(responses) < MIN_ANSWER or max(responses) > MAX_ANSWER:
+        raise ValueError(f"Survey answers must be {MIN_ANSWER}-{MAX_ANSWER}")
+    categories = {}
+    for category_name, indices in CATEGORY_QUESTIONS.items():
+        sentiment, total = analyze_sentiment([responses[i] for i in indices])
+        categories[category_name] = CategoryScore(sentiment, total)
+    return SurveyScores(sum(responses), categories)
+
+# A completed survey as the results page shows it. It is computed once when the survey is
+# finished and only rendered afterwards: band indexes SCORE_BANDS and SCORE_COMMENTARY, and
+# quote indexes the category's quotes in ADVICE_AND_QUOTES.
+CategoryResult = collections.namedtuple("CategoryResult", ["name", "sentiment", "score", "quote"])
+SurveyResult = collections.namedtuple("SurveyResult", ["total", "band", "categories"])
+
+def survey_result(responses, seed=None, scores=None):
+    """
+    Scores a survey (unless scores from score_survey are given) and picks one quote per category.
+    The same seed always picks the same quotes, e.g. a session ID keeps a session's page stable.
+    """
+    scores = scores or score_survey(responses)
+    rng = random.Random(seed)
+    return SurveyResult(scores.total, score_band(scores.total), tuple(
+        CategoryResult(name, sentiment, score, rng.randrange(len(ADVICE_AND_QUOTES[name]["quotes"])))
+        for name, (sentiment, score) in scores.categories.items()
+    ))
+
+def get_physical_sentiment(responses):
+    """Returns the Physical category sentiment, which drives workout intensity."""
+    sentiment, _ = analyze_sentiment([responses[i] for i in CATEGORY_QUESTIONS["Physical"]])
+    return sentiment
+
+
+# --- WORKOUT GENERATION ---
+
+# Sentiments the plan builder distinguishes; anything else is treated as "positive".
+INTENSITY_MODIFIERS = {"positive": 1.0, "neutral": 0.8, "negative": 0.6}
+
+# Plans are shared between sessions, so they are built from immutable records.
+# A plan is a read-only mapping of variation name -> tuple of Day records.
+Exercise = collections.namedtuple("Exercise", ["name", "sets", "reps", "rest", "focus"], defaults=(None, None))
+Day = collections.namedtuple("Day", ["name", "exercises"])
+
+def _weight_loss(exercise):
+    return exercise._replace(reps=max(1, exercise.reps + 2), rest="45-60s", focus=f"{exercise.focus} | Goal: Fat loss")
+
+def _weight_gain(exercise):
+    return exercise._replace(sets=max(1, exercise.sets + 1), rest="75-90s", focus=f"{exercise.focus} | Goal: Muscle gain")
+
+# Bodybuilding goal adjustments, applied per exercise on top of a base plan.
+GOAL_TRANSFORMS = {
+    "Weight Loss": _weight_loss,
+    "Weight Gain": _weight_gain,
+}
+
+def apply_bodybuilding_goal(plan, bodybuilding_goal):
+    """Returns a new plan with the goal adjustments applied. The input plan is never modified."""
+    transform = GOAL_TRANSFORMS.get(bodybuilding_goal)
+    if transform is None:
+        return plan
+    return MappingProxyType({
+        variation: tuple(day._replace(exercises=tuple(transform(ex) for ex in day.exercises)) for day in days)
+        for variation, days in plan.items()
+    })
+
+def plan_key(split, level, physical_sentiment, goal_type, bodybuilding_goal, sport):
+    """
+    Normalizes generate_workout arguments into a catalog key of
+    (goal_type, split/sport, level, sentiment, bodybuilding_goal).
+    Arguments that do not affect the plan are dropped so equivalent requests share one entry.
+    """
+    sentiment = physical_sentiment if physical_sentiment in INTENSITY_MODIFIERS else "positive"
+    if goal_type == "Sports":
+        return ("Sports", sport, level, sentiment, None)
+    if goal_type == "Bodybuilding":
+        return ("Bodybuilding", split, level, sentiment, bodybuilding_goal)
+    return (goal_type, split, level, sentiment, None)
+
+# Plans are shared read-only by every session in the process. lru_cache is thread-safe
+# and bounds memory if callers pass unexpected keys; the full input space is far smaller.
+PLAN_CACHE_SIZE = 512
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _base_plan(goal_type, split_or_sport, level, sentiment):
+    """Builds the goal-independent plan once per process."""
+    if goal_type == "Sports":
+        return _build_workout(None, level, sentiment, goal_type, split_or_sport)
+    return _build_workout(split_or_sport, level, sentiment, goal_type, None)
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def get_plan(key):
+    """Returns the plan for a key from plan_key, derived from its shared base plan and cached."""
+    goal_type, split_or_sport, level, sentiment, bodybuilding_goal = key
+    plan = _base_plan(goal_type, split_or_sport, level, sentiment)
+    if goal_type == "Bodybuilding":
+        plan = apply_bodybuilding_goal(plan, bodybuilding_goal)
+    return plan
+
+@timed("generate_workout")
+def generate_workout(split, level, physical_sentiment, goal_type, bodybuilding_goal, sport):
+    """
+    Returns the workout plan for the given inputs and survey sentiment.
+    Plans come from a per-process catalog and are immutable; use _replace to derive variants.
+    """
+    return get_plan(plan_key(split, level, physical_sentiment, goal_type, bodybuilding_goal, sport))
+
+def plan_cache_info():
+    """Returns hit/miss/size counters for the shared plan cache."""
+    return get_plan.cache_info()
+
+def all_plan_keys():
+    """Yields the catalog key of every plan the app can request."""
+    for level in LEVELS:
+        for sentiment in INTENSITY_MODIFIERS:
+            for split in SPLITS:
+                for bodybuilding_goal in BODYBUILDING_GOALS:
+                    yield ("Bodybuilding", split, level, sentiment, bodybuilding_goal)
+            for sport in SPORTS:
+                yield ("Sports", sport, level, sentiment, None)
+
+def prewarm_plan_cache():
+    """Builds every plan up front so no session pays the build cost. Returns the number of plans."""
+    count = 0
+    for key in all_plan_keys():
+        get_plan(key)
+        count += 1
+    return count
+
+def base_volume(level, physical_sentiment):
+    """Returns the (sets, reps) that library "=s"/"=r" amounts resolve against for a level and sentiment."""
+    base_sets = {"Beginner": 3, "Intermediate": 4, "Advanced": 5}
+    base_reps = {"Beginner": 12, "Intermediate": 8, "Advanced": 6}
+    
+    # Adjust intensity based on the 'Physical' sentiment score from the survey
+    intensity_modifier = INTENSITY_MODIFIERS.get(physical_sentiment, 1.0)
+
+    sets = max(2, int(base_sets[level] * intensity_modifier))
+    reps = max(5, int(base_reps[level] * intensity_modifier))
+    return sets, reps
+
+def _build_workout(split, level, physical_sentiment, goal_type, sport):
+    """Builds the plan for a split or sport from the exercise library. Use generate_workout for the cached plan."""
+    sets, reps = base_volume(level, physical_sentiment)
+
+    # Sports plans come from the sport programs; everything else uses the bodybuilding splits
+    if goal_type == "Sports":
+        program = load_program("Sports", sport)
+    else:
+        program = load_program("Bodybuilding", split)
+    if program is None:
+        return MappingProxyType({})
+
+    return MappingProxyType({
+        variation: tuple(
+            Day(day_name, tuple(
+                Exercise(ex.name, resolve_amount(ex.sets, sets, reps), resolve_amount(ex.reps, sets, reps), ex.rest, ex.focus)
+                for ex in exercises
+            ))
+            for day_name, exercises in days
+        )
+        for variation, days in program.items()
+    })
+
+# Names only, so the tracker can list days without generating a plan.
+# "days" maps each variation name to its day names, in plan order.
+PlanOutline = collections.namedtuple("PlanOutline", ["variations", "days"])
+
+@functools.lru_cache(maxsize=None)
+def plan_outline(split):
+    """Returns the variation and day names of a split or sport, or None if the library has no such program."""
+    program = load_program("Bodybuilding", split) or load_program("Sports", split)
+    if program is None:
+        return None
+    return PlanOutline(
+        variations=tuple(program),
+        days=MappingProxyType({variation: tuple(day_name for day_name, _ in days) for variation, days in program.items()})
+    )
+
+def workout_day_options(split):
+    """Returns the day names of the first variation of a split or sport, or generic names if unknown."""
+    outline = plan_outline(split)
+    if outline is None or not outline.variations:
+        return ["Day 1", "Day 2", "Day 3"]
+    return list(outline.days[outline.variations[0]])
+
+def plan_to_dict(plan):
+    """Converts a plan back into plain {variation: [{"Day": ..., "Exercises": [...]}]} data, e.g. for JSON."""
+    return {
+        variation: [
+            {
+                "Day": day.name,
+                "Exercises": [
+                    {key: value for key, value in (
+                        ("Exercise", ex.name), ("Sets", ex.sets), ("Reps", ex.reps),
+                        ("Rest", ex.rest), ("Focus", ex.focus)
+                    ) if value is not None}
+                    for ex in day.exercises
+                ]
+            }
+            for day in days
+        ]
+        for variation, days in plan.items()
+    }
+
+
+# --- BATCH API ---
+
+def _check_profile(profile):
+    """Raises ValueError if a batch profile is not an object or names an unknown goal type, level, split, sport or goal."""
+    if not isinstance(profile, dict):
+        raise ValueError(f"Expected a profile object, got {type(profile).__name__}")
+    responses = profile.get("survey_responses")
+    if responses is not None and not isinstance(responses, (list, tuple)):
+        raise ValueError(f"survey_responses must be a list of answers, got {type(responses).__name__}")
+
+    def check(field, value, allowed):
+        if value not in allowed:
+            raise ValueError(f"Unknown {field} {value!r}, expected one of {', '.join(map(str, allowed))}")
+
+    check("goal_type", profile.get("goal_type"), GOAL_TYPES)
+    check("level", profile.get("level"), LEVELS)
+    if profile["goal_type"] == "Sports":
+        check("sport", profile.get("sport"), SPORTS)
+    else:
+        check("split", profile.get("split"), SPLITS)
+        check("bodybuilding_goal", profile.get("bodybuilding_goal"), [*BODYBUILDING_GOALS, None])
+
+def generate_plans(profiles):
+    """
+    Generates plans and survey scores for many users in one call.
+    Each profile is a dict shaped like the app's user_data ("goal_type", "split",
+    "level", "bodybuilding_goal", "sport") plus optional "survey_responses" (36 answers).
+    Returns one {"plan", "physical_sentiment", "survey"} dict per profile, in order;
+    "survey" is None when no answers were given.
+    Every profile is checked before any plan is generated; a ValueError names the first bad one.
+    """
+    checked = []
+    for index, profile in enumerate(profiles):
+        try:
+            _check_profile(profile)
+            responses = profile.get("survey_responses")
+            checked.append((profile, score_survey(responses) if responses else None))
+        except ValueError as error:
+            raise ValueError(f"Profile {index}: {error}") from None
+
+    results = []
+    for profile, scores in checked:
+        sentiment = scores.categories["Physical"].sentiment if scores else None
+        plan = generate_workout(
+            profile.get("split"),
+            profile["level"],
+            sentiment,
+            profile.get("goal_type"),
+            profile.get("bodybuilding_goal"),
+            profile.get("sport")
+        )
+        results.append({"plan": plan, "physical_sentiment": sentiment, "survey": scores})
+    return results
+
+def _result_to_dict(result):
+    scores = result["survey"]
+    return {
+        "plan": plan_to_dict(result["plan"]),
+        "physical_sentiment": result["physical_sentiment"],
+        "survey": None if scores is None else {
+            "total": scores.total,
+            "categories": {name: score._asdict() for name, score in scores.categories.items()}
+        }
+    }
+
+def main(argv=None):
+    """Reads a JSON list of profiles (file path or stdin) and writes the results as JSON to stdout."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        with open(argv[0], encoding="utf-8") as f:
+            profiles = json.load(f)
+    else:
+        profiles = json.load(sys.stdin)
+    try:
+        results = generate_plans(profiles)
+    except ValueError as error:
+        sys.exit(f"error: {error}")
+    json.dump([_result_to_dict(r) for r in results], sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
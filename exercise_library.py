@@ -0,0 +1,141 @@
+"""
+Loader for the versioned exercise library stored as JSON under library/.
+
+index.json holds the exercise-name interning table and the file of each program;
+a program file is only read and validated the first time that split or sport is requested.
+attributes.json holds the equipment and target muscles of each exercise, for the plan builder.
+"""
+import collections
+import functools
+import json
+import os
+import re
+import sys
+from types import MappingProxyType
+
+
+LIBRARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "library")
+LIBRARY_VERSION = 1
+
+# Sets/reps written as "=s", "=r+2", "=s-1" are relative to the level- and sentiment-adjusted
+# base sets (s) or reps (r). Any other string, such as "20m" or "45s per side", is shown as-is.
+_FORMULA = re.compile(r"=([sr])([+-]\d+)?")
+
+# sets and reps hold an int, a display string, or a ("s" | "r", offset) formula.
+ExerciseTemplate = collections.namedtuple("ExerciseTemplate", ["name", "sets", "reps", "rest", "focus"])
+LibraryIndex = collections.namedtuple("LibraryIndex", ["exercises", "programs"])
+# equipment is a frozenset of required items (empty for bodyweight), muscles a tuple of muscle groups.
+ExerciseAttributes = collections.namedtuple("ExerciseAttributes", ["equipment", "muscles"])
+
+
+def _check(condition, path, message):
+    if not condition:
+        raise ValueError(f"{path}: {message}")
+
+def _parse_amount(value, path):
+    """Parses a sets/reps cell into an int, a display string or a formula tuple."""
+    if isinstance(value, str) and value.startswith("="):
+        match = _FORMULA.fullmatch(value)
+        _check(match is not None, path, f"invalid formula {value!r}")
+        return (match.group(1), int(match.group(2) or 0))
+    _check(isinstance(value, (int, str)) and not isinstance(value, bool), path, f"invalid amount {value!r}")
+    return value
+
+def resolve_amount(amount, sets, reps):
+    """Turns a parsed sets/reps cell into the value shown to the user."""
+    if isinstance(amount, tuple):
+        base, offset = amount
+        return (sets if base == "s" else reps) + offset
+    return amount
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    _check(isinstance(data, dict), path, "expected a JSON object")
+    _check(data.get("version") == LIBRARY_VERSION, path,
+           f"unsupported library version {data.get('version')!r}, expected {LIBRARY_VERSION}")
+    return data
+
+@functools.lru_cache(maxsize=None)
+def load_index(directory=LIBRARY_DIR):
+    """Reads index.json: interned exercise names and a {goal_type: {program: file}} map, in display order."""
+    path = os.path.join(directory, "index.json")
+    data = _read_json(path)
+    exercises = data.get("exercises")
+    programs = data.get("programs")
+    _check(isinstance(exercises, list) and all(isinstance(n, str) for n in exercises), path,
+           "'exercises' must be a list of names")
+    _check(isinstance(programs, dict) and all(isinstance(p, dict) for p in programs.values()), path,
+           "'programs' must map goal types to {name: file}")
+    return LibraryIndex(
+        tuple(sys.intern(name) for name in exercises),
+        MappingProxyType({goal: MappingProxyType(dict(files)) for goal, files in programs.items()})
+    )
+
+def program_names(goal_type, directory=LIBRARY_DIR):
+    """Returns the split or sport names available for a goal type."""
+    return list(load_index(directory).programs.get(goal_type, {}))
+
+@functools.lru_cache(maxsize=None)
+def load_program(goal_type, name, directory=LIBRARY_DIR):
+    """
+    Loads one program as a read-only {variation: ((day name, (ExerciseTemplate, ...)), ...)} mapping.
+    Returns None if the library has no such program.
+    """
+    index = load_index(directory)
+    relative_path = index.programs.get(goal_type, {}).get(name)
+    if relative_path is None:
+        return None
+    path = os.path.join(directory, relative_path)
+    data = _read_json(path)
+    _check(data.get("goal_type") == goal_type and data.get("name") == name, path,
+           f"file does not describe {goal_type} program {name!r}")
+    variations = data.get("variations")
+    _check(isinstance(variations, dict), path, "'variations' must be an object")
+
+    program = {}
+    for variation, days in variations.items():
+        _check(isinstance(days, list), path, f"{variation}: expected a list of days")
+        parsed_days = []
+        for day in days:
+            _check(isinstance(day, list) and len(day) == 2 and isinstance(day[0], str) and isinstance(day[1], list),
+                   path, f"{variation}: each day must be [name, [exercises]]")
+            day_name, rows = day
+            exercises = []
+            for row in rows:
+                _check(isinstance(row, list) and 3 <= len(row) <= 5, path,
+                       f"{variation}/{day_name}: exercise rows are [id, sets, reps, rest?, focus?]")
+                exercise_id, sets, reps, rest, focus = row + [None] * (5 - len(row))
+                _check(isinstance(exercise_id, int) and 0 <= exercise_id < len(index.exercises), path,
+                       f"{variation}/{day_name}: unknown exercise id {exercise_id!r}")
+                _check(rest is None or isinstance(rest, str), path, f"{variation}/{day_name}: rest must be a string")
+                _check(focus is None or isinstance(focus, str), path, f"{variation}/{day_name}: focus must be a string")
+                exercises.append(ExerciseTemplate(
+                    index.exercises[exercise_id], _parse_amount(sets, path), _parse_amount(reps, path), rest, focus
+                ))
+            parsed_days.append((day_name, tuple(exercises)))
+        program[variation] = tuple(parsed_days)
+    return MappingProxyType(program)
+
+@functools.lru_cache(maxsize=None)
+def load_attributes(directory=LIBRARY_DIR):
+    """Reads attributes.json as a read-only {exercise name: ExerciseAttributes} mapping in library order."""
+    path = os.path.join(directory, "attributes.json")
+    data = _read_json(path)
+    exercises = data.get("exercises")
+    _check(isinstance(exercises, dict), path, "'exercises' must map names to attributes")
+    names = set(load_index(directory).exercises)
+    attributes = {}
+    for name, values in exercises.items():
+        _check(name in names, path, f"unknown exercise {name!r}")
+        _check(isinstance(values, dict), path, f"{name}: expected an object")
+        equipment = values.get("equipment", [])
+        muscles = values.get("muscles", [])
+        _check(isinstance(equipment, list) and all(isinstance(e, str) for e in equipment), path,
+               f"{name}: 'equipment' must be a list of strings")
+        _check(isinstance(muscles, list) and all(isinstance(m, str) for m in muscles), path,
+               f"{name}: 'muscles' must be a list of strings")
+        attributes[sys.intern(name)] = ExerciseAttributes(
+            frozenset(sys.intern(e) for e in equipment), tuple(sys.intern(m) for m in muscles)
+        )
+    return MappingProxyType(attributes)
@@ -0,0 +1,372 @@
+"""
+Concurrent-session load test against a local Streamlit server.
+
+    python loadtest.py --users 50 --concurrency 10
+    python loadtest.py --users 200 --concurrency 50 --logs 5 --think 1.0 --json load.json
+    python loadtest.py --url ws://localhost:8501 --users 20    # an already running server
+
+Each simulated user opens its own websocket session, like a browser tab, and walks the full
+main() flow: both input forms, every survey page, the results page and workout logging.
+Requests carry widget values the way the frontend sends them, so forms, callbacks and
+st.rerun() run exactly as for real users.
+
+Unless --url is given, the server is started here, in a scratch directory and with
+FITECH_PROFILE=1, so the report also includes the server's memory per connected session
+and the session_state bytes each page adds (see profiling.record_state).
+Needs streamlit (and its websockets dependency) installed. The client speaks Streamlit's
+websocket protocol through its private streamlit.proto and streamlit.testing modules, which
+can change between releases; it is tested with the version in TESTED_STREAMLIT and warns
+on any other.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from engine import QUESTIONS
+from profiling import Measurement, Recorder
+
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TF21.py")
+DEFAULT_PORT = 8599
+# Streamlit release (major.minor) whose private protocol modules this client is tested with.
+TESTED_STREAMLIT = "1.65"
+# Seconds to wait for the server to come up and for a single rerun to finish.
+STARTUP_TIMEOUT = 60
+RERUN_TIMEOUT = 60
+# Keys reported per page as the largest session_state growth.
+TOP_KEYS = 5
+
+
+# --- CLIENT ---
+
+def _find(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"No widget labelled {label!r}; the page may have changed")
+
+def _widget(element, **value):
+    """WidgetState for an element, e.g. _widget(button, trigger_value=True)."""
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+    return WidgetState(id=element.id, **value)
+
+class Session:
+    """One websocket session. Each rerun is timed from the request until the script finishes."""
+
+    def __init__(self, websocket, name, recorder):
+        self.websocket = websocket
+        self.name = name
+        self.recorder = recorder
+
+    async def rerun(self, step, widgets=()):
+        """Sends widget values and waits for the resulting run (following st.rerun()); returns its element tree."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.testing.v1.element_tree import parse_tree_from_messages
+
+        request = BackMsg()
+        request.rerun_script.widget_states.widgets.extend(widgets)
+        start = time.perf_counter()
+        await self.websocket.send(request.SerializeToString())
+        messages = []
+        while True:
+            message = ForwardMsg()
+            message.ParseFromString(await asyncio.wait_for(self.websocket.recv(), RERUN_TIMEOUT))
+            kind = message.WhichOneof("type")
+            if kind == "new_session":
+                # Each script run starts over; only the last run's elements are on the page
+                messages = []
+            messages.append(message)
+            if kind == "script_finished" and message.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        seconds = time.perf_counter() - start
+        self.recorder.record(Measurement(step, self.name, seconds, 0, None, time.time()))
+        tree = parse_tree_from_messages(messages)
+        if tree.exception:
+            raise RuntimeError(f"{step}: {tree.exception[0].value}")
+        return tree
+
+
+async def simulate_user(url, name, rng, logs, think, recorder, slot, finished, done):
+    """
+    Walks one user through the app while holding a concurrency slot, reports the outcome with
+    finished(error or None), then keeps the session connected until done is set.
+    """
+    import websockets
+
+    async def pause():
+        if think:
+            await asyncio.sleep(rng.uniform(0, think))
+
+    await slot.acquire()
+    try:
+        websocket = await websockets.connect(f"{url}/_stcore/stream", max_size=None)
+    except Exception as error:
+        slot.release()
+        finished(error)
+        return
+    try:
+        try:
+            await _walk(Session(websocket, name, recorder), name, rng, logs, pause)
+        finally:
+            slot.release()
+    except Exception as error:
+        finished(error)
+    else:
+        finished(None)
+        await done.wait()
+    finally:
+        await websocket.close()
+
+def _survey_questions(page):
+    """The answer radios on a survey page, in question order; empty once the survey is over."""
+    return [radio for radio in page.radio if radio.key and radio.key.startswith("ans_")]
+
+async def _walk(session, name, rng, logs, pause):
+    page = await session.rerun("load")
+    await pause()
+
+    page = await session.rerun("basic_form", [
+        _widget(_find(page.text_input, "Name:"), string_value=name),
+        _widget(_find(page.number_input, "Age:"), int_value=rng.randint(18, 60)),
+        _widget(_find(page.radio, "Would you like to take a mental checkup survey to tailor your plan?"), string_value="Yes"),
+        _widget(_find(page.button, "Next →"), trigger_value=True),
+    ])
+    await pause()
+
+    page = await session.rerun("details_form", [_widget(_find(page.button, "✓ Generate Plan"), trigger_value=True)])
+    questions = _survey_questions(page)
+    # Every page must move on to new questions, so the survey ends within this many pages
+    max_pages = math.ceil(len(QUESTIONS) / len(questions)) if questions else 0
+    for _ in range(max_pages):
+        await pause()
+        answers = [_widget(radio, string_value=str(rng.randint(1, 5))) for radio in questions]
+        page = await session.rerun("survey_page", [*answers, _widget(_find(page.button, "Next ➡️"), trigger_value=True)])
+        previous, questions = questions, _survey_questions(page)
+        if not questions:
+            break
+        if questions[0].key == previous[0].key:
+            warnings = "; ".join(w.value for w in page.warning)
+            raise RuntimeError(f"survey_page: the survey did not advance past {previous[0].key} ({warnings or 'no warning'})")
+    if questions:
+        raise RuntimeError(f"survey_page: still on {questions[0].key} after {max_pages} pages")
+    await pause()
+
+    # A plain rerun of the results page, as after switching tabs or a plan variation
+    page = await session.rerun("results")
+    for _ in range(logs):
+        await pause()
+        page = await session.rerun("log_workout", [_widget(_find(page.button, "Log Workout"), trigger_value=True)])
+
+
+# --- SERVER ---
+
+def start_server(port, workdir, profile_path):
+    """Starts the app headless in workdir with profiling on; measurements go to profile_path on exit."""
+    env = dict(os.environ, FITECH_PROFILE="1", FITECH_PROFILE_EXPORT=profile_path)
+    return subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def wait_until_ready(http_url, timeout=STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{http_url}/_stcore/health", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"Server at {http_url} did not become ready within {timeout}s")
+
+def rss_bytes(pid):
+    """Resident memory of a process from /proc, or None where that is not available."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def state_report(profile_path):
+    """
+    Reads the server's state:<page>[:<key>] measurements and returns the mean session_state
+    bytes per session and, per page, the keys whose size grew most across its reruns.
+    """
+    snapshots = collections.defaultdict(dict)
+    totals = {}
+    with open(profile_path, encoding="utf-8") as f:
+        for line in f:
+            m = json.loads(line)
+            if not m["stage"].startswith("state:"):
+                continue
+            _, page, *key = m["stage"].split(":", 2)
+            snapshot = snapshots[(m["session"], m["timestamp"])]
+            snapshot["page"] = page
+            if key:
+                snapshot.setdefault("keys", {})[key[0]] = m["allocated_bytes"]
+            else:
+                totals[m["session"]] = (m["timestamp"], m["allocated_bytes"])
+
+    growth = collections.defaultdict(lambda: collections.defaultdict(list))
+    previous = {}
+    for (session, _), snapshot in sorted(snapshots.items(), key=lambda item: item[0][1]):
+        keys = snapshot.get("keys", {})
+        before = previous.get(session, {})
+        for key, size in keys.items():
+            growth[snapshot["page"]][key].append(size - before.get(key, 0))
+        previous[session] = keys
+
+    final = [size for _, size in totals.values()]
+    return {
+        "mean_bytes_per_session": sum(final) / len(final) if final else None,
+        "growth_by_page": {
+            page: sorted(((key, sum(d) / len(d)) for key, d in keys.items()), key=lambda kv: -kv[1])[:TOP_KEYS]
+            for page, keys in growth.items()
+        },
+    }
+
+
+# --- RUN ---
+
+async def run_users(url, users, concurrency, logs, think, seed, recorder, on_all_finished=None):
+    """
+    Runs every simulated user with at most concurrency flows in progress. Finished sessions stay
+    connected until all flows are over; on_all_finished() is called at that point.
+    Returns (names, errors).
+    """
+    rng = random.Random(seed)
+    slot = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+    # Unique per call, so no user takes over a profile saved by an earlier run or the warm-up
+    names = [f"loadtest-{seed}-{time.time_ns()}-{i}" for i in range(users)]
+    errors = []
+    remaining = [users]
+
+    def finisher(name):
+        def finished(error):
+            if error is not None:
+                errors.append(f"{name}: {error!r}")
+            remaining[0] -= 1
+            if not remaining[0]:
+                if on_all_finished is not None:
+                    on_all_finished()
+                done.set()
+        return finished
+
+    await asyncio.gather(*(
+        simulate_user(url, name, random.Random(rng.random()), logs, think, recorder, slot, finisher(name), done)
+        for name in names
+    ))
+    return names, errors
+
+def run(users, concurrency, logs=2, think=0.0, seed=0, url=None, port=DEFAULT_PORT):
+    """Runs the load test and returns the report as a dict."""
+    recorder = Recorder(max_samples=1_000_000)
+    server = None
+    memory = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        profile_path = os.path.join(workdir, "profile.jsonl")
+        if url is None:
+            server = start_server(port, workdir, profile_path)
+            url = f"ws://localhost:{port}"
+        http_url = url.replace("ws://", "http://", 1).replace("wss://", "https://", 1)
+        try:
+            wait_until_ready(http_url)
+            # One warm-up session fills the process-wide caches before the baseline is taken
+            asyncio.run(run_users(url, 1, 1, 0, 0.0, seed, Recorder()))
+            if server is not None:
+                memory["baseline_rss"] = rss_bytes(server.pid)
+
+            def on_all_finished():
+                if server is not None:
+                    memory["loaded_rss"] = rss_bytes(server.pid)
+
+            start = time.perf_counter()
+            names, errors = asyncio.run(run_users(url, users, concurrency, logs, think, seed, recorder, on_all_finished))
+            wall = time.perf_counter() - start
+        finally:
+            if server is not None:
+                # SIGINT lets Streamlit shut down cleanly, so the profile is written at exit
+                server.send_signal(signal.SIGINT)
+                try:
+                    server.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+        completed = users - len(errors)
+        reruns = len(recorder.measurements())
+        report = {
+            "users": users,
+            "concurrency": concurrency,
+            "completed": completed,
+            "errors": errors,
+            "wall_seconds": wall,
+            "flows_per_second": completed / wall,
+            "reruns_per_second": reruns / wall,
+            "steps": recorder.summary(),
+        }
+        if memory.get("baseline_rss") is not None and memory.get("loaded_rss") is not None:
+            report["rss_bytes_per_session"] = (memory["loaded_rss"] - memory["baseline_rss"]) / users
+        if server is not None and os.path.exists(profile_path):
+            report["session_state"] = state_report(profile_path)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated users through the FiTech app.")
+    parser.add_argument("--users", type=int, default=20, help="Number of simulated users.")
+    parser.add_argument("--concurrency", type=int, default=5, help="User flows in progress at the same time.")
+    parser.add_argument("--logs", type=int, default=2, help="Workouts each user logs on the results page.")
+    parser.add_argument("--think", type=float, default=0.0, help="Maximum random pause between steps, in seconds.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="ws:// URL of a running server instead of starting one.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port for the server started here.")
+    parser.add_argument("--json", metavar="PATH", help="Write the full report as JSON.")
+    args = parser.parse_args(argv)
+
+    import streamlit
+    if not streamlit.__version__.startswith(TESTED_STREAMLIT + "."):
+        print(f"warning: tested with streamlit {TESTED_STREAMLIT}.x, found {streamlit.__version__}", file=sys.stderr)
+
+    report = run(args.users, args.concurrency, args.logs, args.think, args.seed, args.url, args.port)
+
+    print(f"{report['completed']}/{report['users']} users completed in {report['wall_seconds']:.2f}s "
+          f"({report['flows_per_second']:.2f} flows/s, {report['reruns_per_second']:.1f} reruns/s)")
+    print(f"{'step':15s} {'count':>6s} {'p50':>9s} {'p90':>9s} {'p99':>9s}")
+    for row in report["steps"]:
+        print(f"{row['stage']:15s} {row['count']:6d} {row['p50']:9.4f} {row['p90']:9.4f} {row['p99']:9.4f}")
+    if "rss_bytes_per_session" in report:
+        print(f"server memory per connected session: {report['rss_bytes_per_session'] / 1024:.1f} KiB")
+    state = report.get("session_state")
+    if state and state["mean_bytes_per_session"] is not None:
+        print(f"session_state per session: {state['mean_bytes_per_session'] / 1024:.1f} KiB")
+        for page, keys in state["growth_by_page"].items():
+            grown = ", ".join(f"{key} {size / 1024:+.1f} KiB" for key, size in keys if size > 0)
+            if grown:
+                print(f"  {page}: {grown}")
+    for error in report["errors"]:
+        print(f"ERROR {error}", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Persistent, append-only storage for workout logs, backed by SQLite in WAL mode."""
+import datetime
+import itertools
+import os
+import sqlite3
+import tempfile
+import threading
+
+from analytics import LogStats
+from progression import ProgressionState
+from workout_log import LogColumns, LogEntry, SetRecord, check_entry, entry_from_dict
+
+
+DEFAULT_DB_PATH = "fitech.db"
+
+# The entry tables alone are also the layout of an import's staging file.
+_ENTRY_TABLES = """
+CREATE TABLE IF NOT EXISTS workout_logs (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    date TEXT NOT NULL,
+    workout_day TEXT NOT NULL,
+    completed INTEGER NOT NULL,
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS workout_sets (
+    log_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    exercise TEXT NOT NULL,
+    sets INTEGER,
+    reps INTEGER,
+    load REAL,
+    PRIMARY KEY (log_id, position)
+);
+"""
+
+_SCHEMA = _ENTRY_TABLES + """
+CREATE INDEX IF NOT EXISTS idx_workout_logs_user_date ON workout_logs (user, date);
+CREATE INDEX IF NOT EXISTS idx_workout_logs_user_day ON workout_logs (user, workout_day, date);
+CREATE TABLE IF NOT EXISTS log_stats (
+    user TEXT PRIMARY KEY,
+    stats TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS progression (
+    user TEXT PRIMARY KEY,
+    stats TEXT NOT NULL
+);
+"""
+
+# Per-user running state kept next to the log, by table. Each class provides
+# add(date, workout_day, completed, notes, exercises), to_json() and from_json().
+_AGGREGATES = {
+    "log_stats": LogStats,
+    "progression": ProgressionState,
+}
+
+
+def _insert(conn, user, date, entry):
+    """Writes one entry and its exercise rows on a connection that is in a write transaction."""
+    log_id = conn.execute(
+        "INSERT INTO workout_logs (user, date, workout_day, completed, notes) VALUES (?, ?, ?, ?, ?)",
+        (user, date, entry.workout_day, int(entry.completed), entry.notes)
+    ).lastrowid
+    conn.executemany(
+        "INSERT INTO workout_sets (log_id, position, exercise, sets, reps, load) VALUES (?, ?, ?, ?, ?, ?)",
+        [(log_id, position, r.exercise, r.sets, r.reps, r.load) for position, r in enumerate(entry.exercises)]
+    )
+
+def _as_entry(entry):
+    """Accepts a LogEntry or the {"Date", "Workout Day", "Completed", "Notes"} dict shape."""
+    return entry_from_dict(entry) if isinstance(entry, dict) else entry
+
+
+class LogStore:
+    """
+    Workout logs for all users in one SQLite file.
+    Entries are only ever appended; reads go through the (user, date) and (user, day) indexes.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        # Streamlit serves sessions from several threads, so one connection is shared behind a lock.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def append(self, user, entry):
+        """Stores a single log entry for a user."""
+        self.bulk_append(user, [entry])
+
+    def bulk_append(self, user, entries):
+        """
+        Stores many log entries for a user in one transaction. Returns the number written.
+        The user's running aggregates are updated in the same transaction, at O(1) per entry
+        when the entries are in date order after the user's last log, and rebuilt otherwise.
+        Raises ValueError, before anything is written, if an entry fails workout_log.check_entry.
+        """
+        entries = [_as_entry(entry) for entry in entries]
+        for entry in entries:
+            check_entry(entry)
+        dates = [entry.date.isoformat() for entry in entries]
+        with self._lock, self._conn:
+            # Takes SQLite's write lock before the aggregates are read, so other stores and
+            # processes on the same file cannot update them in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            last = self._conn.execute("SELECT MAX(date) FROM workout_logs WHERE user = ?", (user,)).fetchone()[0]
+            in_order = dates == sorted(dates) and (last is None or not dates or dates[0] >= last)
+            aggregates = {table: self._load_aggregate(table, user) for table in _AGGREGATES} if in_order else {}
+            for date, entry in zip(dates, entries):
+                _insert(self._conn, user, date, entry)
+                for aggregate in aggregates.values():
+                    aggregate.add(date, entry.workout_day, entry.completed, entry.notes, entry.exercises)
+            if in_order:
+                for table, aggregate in aggregates.items():
+                    self._save_aggregate(table, user, aggregate)
+            else:
+                # Backfilled history: streaks and weekly progression depend on date order
+                self._rebuild_aggregates(user)
+        return len(entries)
+
+    def import_entries(self, pairs):
+        """
+        Stores (user, LogEntry) pairs from an iterator in a single transaction. If the iterator
+        or workout_log.check_entry raises, nothing is stored. Entries may come in any date order;
+        the aggregates of every imported user are rebuilt from their whole log afterwards.
+        Returns the number of entries written.
+
+        The pairs are parsed and checked into a private staging file first, so other sessions
+        are only locked out while the staged rows are copied in and the aggregates rebuilt.
+        """
+        with tempfile.TemporaryDirectory(prefix="fitech-import-") as directory:
+            staging_path = os.path.join(directory, "staging.db")
+            staging = sqlite3.connect(staging_path)
+            try:
+                # Thrown away on any error, so it needs no journal or fsync
+                staging.execute("PRAGMA journal_mode=OFF")
+                staging.execute("PRAGMA synchronous=OFF")
+                staging.executescript(_ENTRY_TABLES)
+                with staging:
+                    for user, entry in pairs:
+                        check_entry(entry)
+                        _insert(staging, user, entry.date.isoformat(), entry)
+            finally:
+                staging.close()
+            return self._copy_staged(staging_path)
+
+    def _copy_staged(self, staging_path):
+        """Appends the entries of a staging file written by import_entries. Returns the number copied."""
+        with self._lock:
+            # ATTACH and DETACH are not allowed inside a transaction
+            self._conn.execute("ATTACH DATABASE ? AS staging", (staging_path,))
+            try:
+                with self._conn:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    # Staged ids start at 1; shifting them past the current maximum keeps the import
+                    # order and each entry's exercise rows, without a round trip per entry
+                    offset = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM main.workout_logs").fetchone()[0]
+                    count = self._conn.execute(
+                        "INSERT INTO main.workout_logs (id, user, date, workout_day, completed, notes) "
+                        "SELECT id + ?, user, date, workout_day, completed, notes FROM staging.workout_logs ORDER BY id",
+                        (offset,)
+                    ).rowcount
+                    self._conn.execute(
+                        "INSERT INTO main.workout_sets (log_id, position, exercise, sets, reps, load) "
+                        "SELECT log_id + ?, position, exercise, sets, reps, load FROM staging.workout_sets",
+                        (offset,)
+                    )
+                    users = [row[0] for row in self._conn.execute("SELECT DISTINCT user FROM staging.workout_logs")]
+                    for user in users:
+                        self._rebuild_aggregates(user)
+            finally:
+                self._conn.execute("DETACH DATABASE staging")
+        return count
+
+    def stats(self, user):
+        """Returns the running LogStats for a user."""
+        return self._read_aggregate("log_stats", user)
+
+    def progression(self, user):
+        """Returns the ProgressionState for a user."""
+        return self._read_aggregate("progression", user)
+
+    def _read_aggregate(self, table, user):
+        with self._lock:
+            row = self._conn.execute(f"SELECT stats FROM {table} WHERE user = ?", (user,)).fetchone()
+            if row is not None:
+                return _AGGREGATES[table].from_json(row[0])
+            # Logs written before the aggregate existed are folded in and saved once
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                aggregate = self._load_aggregate(table, user)
+                self._save_aggregate(table, user, aggregate)
+            return aggregate
+
+    def _load_aggregate(self, table, user):
+        """
+        Reads a user's row from an aggregate table, or folds the user's logs in date order
+        if there is none. Caller holds the lock.
+        """
+        row = self._conn.execute(f"SELECT stats FROM {table} WHERE user = ?", (user,)).fetchone()
+        if row is not None:
+            return _AGGREGATES[table].from_json(row[0])
+        return self._fold(table, user)
+
+    def _fold(self, table, user):
+        """Builds an aggregate from the user's whole log in date order. Caller holds the lock."""
+        aggregate = _AGGREGATES[table]()
+        for entry in self._entries(user, order="date, id"):
+            aggregate.add(entry.date.isoformat(), entry.workout_day, entry.completed, entry.notes, entry.exercises)
+        return aggregate
+
+    def _rebuild_aggregates(self, user):
+        """Caller holds the lock and is in a write transaction."""
+        for table in _AGGREGATES:
+            self._save_aggregate(table, user, self._fold(table, user))
+
+    def _save_aggregate(self, table, user, aggregate):
+        """Caller holds the lock and is in a write transaction."""
+        self._conn.execute(f"INSERT OR REPLACE INTO {table} (user, stats) VALUES (?, ?)", (user, aggregate.to_json()))
+
+    def count(self, user, workout_day=None):
+        """Returns how many entries a user has, optionally for a single workout day."""
+        sql = "SELECT COUNT(*) FROM workout_logs WHERE user = ?"
+        params = [user]
+        if workout_day is not None:
+            sql += " AND workout_day = ?"
+            params.append(workout_day)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def page(self, user, page=0, page_size=20):
+        """Returns one page of a user's history as LogEntry records, newest first."""
+        return self.query(user, limit=page_size, offset=page * page_size)
+
+    def query(self, user, start=None, end=None, workout_day=None, limit=None, offset=0):
+        """
+        Returns a user's entries as LogEntry records, newest first, filtered by an
+        inclusive date range (datetime.date or "YYYY-MM-DD") and/or workout day.
+        """
+        with self._lock:
+            return list(self._entries(user, start, end, workout_day, limit, offset))
+
+    def columns(self, user, start=None, end=None):
+        """Loads a user's entries, oldest first, into a compact LogColumns container."""
+        with self._lock:
+            return LogColumns(self._entries(user, start, end, order="date, id"))
+
+    def _entries(self, user, start=None, end=None, workout_day=None, limit=None, offset=0, order="date DESC, id DESC"):
+        """Returns an iterator of LogEntry records with their exercise rows. Caller holds the lock."""
+        sql = "SELECT id, date, workout_day, completed, notes FROM workout_logs WHERE user = ?"
+        params = [user]
+        if workout_day is not None:
+            sql += " AND workout_day = ?"
+            params.append(workout_day)
+        if start is not None:
+            sql += " AND date >= ?"
+            params.append(str(start))
+        if end is not None:
+            sql += " AND date <= ?"
+            params.append(str(end))
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return self._with_sets(self._conn.execute(sql, params).fetchall())
+
+    def iter_batches(self, user, batch_size=5000):
+        """
+        Yields a user's entries, oldest first, as lists of at most batch_size LogEntry records.
+        Each batch resumes after the last (date, id) seen and the lock is released in between,
+        so exporting a long history neither holds it in memory nor blocks logging.
+        """
+        after = ("", 0)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, date, workout_day, completed, notes FROM workout_logs "
+                    "WHERE user = ? AND (date, id) > (?, ?) ORDER BY date, id LIMIT ?",
+                    (user, *after, batch_size)
+                ).fetchall()
+                entries = list(self._with_sets(rows))
+            if not entries:
+                return
+            yield entries
+            after = (rows[-1][1], rows[-1][0])
+
+    def _with_sets(self, rows):
+        """Yields LogEntry records for workout_logs rows, with their exercise rows. Caller holds the lock."""
+        # Exercise rows are fetched in batches of entries to keep the IN list bounded
+        for batch_start in range(0, len(rows), 500):
+            batch = rows[batch_start:batch_start + 500]
+            placeholders = ",".join("?" * len(batch))
+            sets = {
+                log_id: tuple(SetRecord(*record) for _, *record in group)
+                for log_id, group in itertools.groupby(
+                    self._conn.execute(
+                        f"SELECT log_id, exercise, sets, reps, load FROM workout_sets "
+                        f"WHERE log_id IN ({placeholders}) ORDER BY log_id, position",
+                        [row[0] for row in batch]
+                    ),
+                    key=lambda r: r[0]
+                )
+            }
+            for log_id, date, workout_day, completed, notes in batch:
+                yield LogEntry(
+                    datetime.date.fromisoformat(date), workout_day, bool(completed), notes, sets.get(log_id, ())
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,88 @@
+"""
+Periodized programs: mesocycles of several weeks built from the weekly split and sport plans,
+with planned progression, deload weeks and variation rotation.
+
+A Program only describes the cycle. Each week is derived from the shared weekly plan when it is
+viewed or exported, so holding a 16-week program costs the same as holding a 4-week one.
+"""
+import collections
+import functools
+
+from engine import get_plan
+from progression import MAX_STEP, MIN_STEP, progress_exercise
+
+
+MIN_WEEKS = 4
+MAX_WEEKS = 16
+DEFAULT_WEEKS = 8
+# Weeks per block; the last week of each block is a deload and the next block rotates to the next variation.
+DEFAULT_BLOCK_WEEKS = 4
+# Progression step of a deload week: one set fewer and longer rest (see progression.progress_exercise).
+DELOAD_STEP = -1
+# Step pattern across the loading weeks of a block for undulating progression: base, heavy, medium.
+UNDULATING_STEPS = (0, 2, 1)
+
+def _linear_step(block, position):
+    # Each loading week adds a step, and each block starts one step above the previous one
+    return block + position
+
+def _undulating_step(block, position):
+    # The wave repeats every block, shifted up one step every second block
+    return UNDULATING_STEPS[position % len(UNDULATING_STEPS)] + block // 2
+
+PROGRESSION_MODELS = {
+    "Linear": _linear_step,
+    "Undulating": _undulating_step,
+}
+
+# key is a plan catalog key from engine.plan_key; the whole record is hashable and tiny.
+Program = collections.namedtuple("Program", ["key", "weeks", "model", "block_weeks"])
+# Where a week sits in the cycle, known without building it.
+WeekPlan = collections.namedtuple("WeekPlan", ["number", "variation", "step", "deload"])
+Week = collections.namedtuple("Week", ["number", "variation", "step", "deload", "days"])
+
+
+def make_program(key, weeks=DEFAULT_WEEKS, model="Linear", block_weeks=DEFAULT_BLOCK_WEEKS):
+    """Validates and returns a Program for a plan catalog key."""
+    if not MIN_WEEKS <= weeks <= MAX_WEEKS:
+        raise ValueError(f"Programs run {MIN_WEEKS}-{MAX_WEEKS} weeks, got {weeks}")
+    if model not in PROGRESSION_MODELS:
+        raise ValueError(f"Unknown progression model {model!r}, expected one of {', '.join(PROGRESSION_MODELS)}")
+    if not 2 <= block_weeks <= weeks:
+        raise ValueError(f"Blocks need 2-{weeks} weeks, got {block_weeks}")
+    return Program(key, weeks, model, block_weeks)
+
+def week_plan(program, number):
+    """Returns the variation, progression step and deload flag of week number (1-based)."""
+    if not 1 <= number <= program.weeks:
+        raise ValueError(f"Week {number} is outside this {program.weeks}-week program")
+    block, position = divmod(number - 1, program.block_weeks)
+    deload = position == program.block_weeks - 1
+    if deload:
+        step = DELOAD_STEP
+    else:
+        step = max(MIN_STEP, min(MAX_STEP, PROGRESSION_MODELS[program.model](block, position)))
+    variations = tuple(get_plan(program.key))
+    variation = variations[block % len(variations)] if variations else None
+    return WeekPlan(number, variation, step, deload)
+
+def schedule(program):
+    """Returns the WeekPlan of every week, e.g. for listing weeks without building them."""
+    return [week_plan(program, number) for number in range(1, program.weeks + 1)]
+
+# Weeks are shared by every user on the same program; this bounds how many stay built.
+WEEK_CACHE_SIZE = 1024
+
+@functools.lru_cache(maxsize=WEEK_CACHE_SIZE)
+def program_week(program, number):
+    """Builds week number (1-based) of a program from its weekly plan."""
+    number, variation, step, deload = week_plan(program, number)
+    days = get_plan(program.key).get(variation, ())
+    return Week(number, variation, step, deload, tuple(
+        day._replace(exercises=tuple(progress_exercise(ex, step) for ex in day.exercises)) for day in days
+    ))
+
+def iter_weeks(program, start=1, stop=None):
+    """Yields weeks start to stop (inclusive, the whole program by default), building each one when it is reached."""
+    for number in range(start, (stop or program.weeks) + 1):
+        yield program_week(program, number)
@@ -0,0 +1,283 @@
+"""
+Custom plans composed from constraints: days per week, session length, available equipment,
+target muscles and excluded exercises.
+
+Candidates come from an inverted index over exercise attributes (muscle -> exercises,
+equipment -> exercises), so building a plan is a handful of set operations and short
+posting-list walks rather than a scan of every program.
+"""
+import collections
+import functools
+import re
+import time
+from types import MappingProxyType
+
+from engine import LEVELS, Day, Exercise, base_volume
+from exercise_library import LIBRARY_DIR, ExerciseTemplate, load_attributes, load_index, load_program, resolve_amount
+
+
+MIN_DAYS = 1
+MAX_DAYS = 6
+MIN_MINUTES = 15
+MAX_MINUTES = 180
+# Building stops adding optional exercises once this many seconds have passed.
+BUILD_TIME_LIMIT = 0.05
+# The single variation of a custom plan, so it renders like a catalog plan.
+CUSTOM_VARIATION = "Custom"
+
+# Muscle slots per day type, in the order they are filled; repeats ask for a second exercise.
+PUSH = ("chest", "shoulders", "triceps", "chest", "core")
+PULL = ("back", "lats", "biceps", "back", "forearms")
+LEGS = ("quads", "hamstrings", "glutes", "calves", "core")
+UPPER = ("chest", "back", "shoulders", "lats", "triceps", "biceps")
+LOWER = ("quads", "hamstrings", "glutes", "calves", "core")
+FULL_BODY = ("quads", "chest", "back", "hamstrings", "shoulders", "core", "conditioning")
+
+# (day name, slots) per number of training days.
+DAY_TEMPLATES = {
+    1: (("Full Body", FULL_BODY),),
+    2: (("Upper", UPPER), ("Lower", LOWER)),
+    3: (("Push", PUSH), ("Pull", PULL), ("Legs", LEGS)),
+    4: (("Upper A", UPPER), ("Lower A", LOWER), ("Upper B", UPPER), ("Lower B", LOWER)),
+    5: (("Push", PUSH), ("Pull", PULL), ("Legs", LEGS), ("Upper", UPPER), ("Lower", LOWER)),
+    6: (("Push A", PUSH), ("Pull A", PULL), ("Legs A", LEGS), ("Push B", PUSH), ("Pull B", PULL), ("Legs B", LEGS)),
+}
+
+# Words in a template's Focus text that name a muscle group, e.g. "Lats and biceps" or "Mid-back".
+FOCUS_MUSCLES = {
+    "chest": "chest", "shoulders": "shoulders", "triceps": "triceps", "back": "back", "lats": "lats",
+    "biceps": "biceps", "quads": "quads", "hamstrings": "hamstrings", "glutes": "glutes", "calves": "calves",
+    "core": "core",
+}
+
+# Session time estimates
+SECONDS_PER_REP = 3
+DEFAULT_SET_SECONDS = 45
+DEFAULT_REST_SECONDS = 60
+_SECONDS = re.compile(r"(\d+)\s*s\b")
+_NUMBER = re.compile(r"\d+")
+
+# equipment, muscles and exclude are sorted tuples so equal requests share one cached plan.
+Constraints = collections.namedtuple(
+    "Constraints", ["days_per_week", "minutes_per_session", "equipment", "muscles", "exclude", "level", "sentiment"]
+)
+
+
+def make_constraints(days_per_week, minutes_per_session, equipment=(), muscles=(), exclude=(),
+                     level=LEVELS[0], sentiment="positive"):
+    """Validates and normalizes builder inputs into a hashable Constraints record."""
+    if not MIN_DAYS <= days_per_week <= MAX_DAYS:
+        raise ValueError(f"Plans have {MIN_DAYS}-{MAX_DAYS} days per week, got {days_per_week}")
+    if not MIN_MINUTES <= minutes_per_session <= MAX_MINUTES:
+        raise ValueError(f"Sessions last {MIN_MINUTES}-{MAX_MINUTES} minutes, got {minutes_per_session}")
+    if level not in LEVELS:
+        raise ValueError(f"Unknown level {level!r}")
+    return Constraints(
+        days_per_week, minutes_per_session, tuple(sorted(set(equipment))), tuple(sorted(set(muscles))),
+        tuple(sorted(set(exclude))), level, sentiment
+    )
+
+
+# --- INDEX ---
+
+class ExerciseIndex:
+    """
+    Inverted index over the exercise library. Exercise ids are positions in library order;
+    posting lists map each muscle and each piece of equipment to the ids that use it.
+    An exercise's first listed muscle is its primary one.
+    """
+
+    __slots__ = ("names", "templates", "muscles", "by_muscle", "by_equipment", "_ids", "_all")
+
+    def __init__(self, entries):
+        """entries: (name, ExerciseTemplate, ExerciseAttributes) in library order."""
+        self.names = []
+        self.templates = []
+        self.muscles = []
+        by_muscle = collections.defaultdict(list)
+        by_equipment = collections.defaultdict(list)
+        for ex_id, (name, template, attributes) in enumerate(entries):
+            muscles = tuple(dict.fromkeys([*attributes.muscles, *_focus_muscles(template.focus)]))
+            self.names.append(name)
+            self.templates.append(template)
+            self.muscles.append(muscles)
+            for rank, muscle in enumerate(muscles):
+                by_muscle[muscle].append((rank, ex_id))
+            for item in attributes.equipment:
+                by_equipment[item].append(ex_id)
+        # Exercises that train a muscle primarily come first in its posting list
+        self.by_muscle = {muscle: tuple(ex_id for _, ex_id in sorted(ids)) for muscle, ids in by_muscle.items()}
+        self.by_equipment = {item: frozenset(ids) for item, ids in by_equipment.items()}
+        self._ids = {name: ex_id for ex_id, name in enumerate(self.names)}
+        self._all = frozenset(range(len(self.names)))
+
+    def __len__(self):
+        return len(self.names)
+
+    def equipment(self):
+        return sorted(self.by_equipment)
+
+    def allowed(self, equipment=(), exclude=()):
+        """Ids of exercises that need nothing beyond the given equipment and are not excluded by name."""
+        blocked = set()
+        for item, ids in self.by_equipment.items():
+            if item not in equipment:
+                blocked |= ids
+        blocked.update(self._ids[name] for name in exclude if name in self._ids)
+        return self._all - blocked
+
+    def exercise(self, ex_id, sets, reps):
+        """Resolves an exercise's template against the (sets, reps) of a level and sentiment."""
+        template = self.templates[ex_id]
+        return Exercise(
+            template.name, resolve_amount(template.sets, sets, reps), resolve_amount(template.reps, sets, reps),
+            template.rest, template.focus or ", ".join(m.capitalize() for m in self.muscles[ex_id])
+        )
+
+
+def _focus_muscles(focus):
+    return [FOCUS_MUSCLES[word] for word in re.findall(r"[a-z]+", (focus or "").lower()) if word in FOCUS_MUSCLES]
+
+@functools.lru_cache(maxsize=None)
+def load_exercise_index(directory=LIBRARY_DIR):
+    """
+    Builds the index once per process. Each exercise keeps the prescription (sets/reps formulas,
+    rest, focus) of its first appearance in the library programs.
+    """
+    templates = {}
+    for goal_type, programs in load_index(directory).programs.items():
+        for name in programs:
+            for days in load_program(goal_type, name, directory).values():
+                for _, exercises in days:
+                    for template in exercises:
+                        templates.setdefault(template.name, template)
+    return ExerciseIndex(
+        (name, templates.get(name) or ExerciseTemplate(name, ("s", 0), ("r", 0), None, None), attributes)
+        for name, attributes in load_attributes(directory).items()
+    )
+
+
+# --- TIME ESTIMATES ---
+
+def _set_seconds(reps):
+    if isinstance(reps, int):
+        return reps * SECONDS_PER_REP
+    match = _SECONDS.search(reps or "")
+    if match:
+        # "45s per side" takes twice as long
+        return int(match.group(1)) * (2 if "side" in reps else 1)
+    return DEFAULT_SET_SECONDS
+
+def _rest_seconds(rest):
+    numbers = [int(n) for n in _NUMBER.findall(rest or "")]
+    return sum(numbers) / len(numbers) if numbers else DEFAULT_REST_SECONDS
+
+def estimate_seconds(exercise):
+    """Rough duration of an exercise: each set's work time plus the rest after it."""
+    sets = exercise.sets if isinstance(exercise.sets, int) else 1
+    return sets * (_set_seconds(exercise.reps) + _rest_seconds(exercise.rest))
+
+def estimate_minutes(day):
+    return round(sum(estimate_seconds(ex) for ex in day.exercises) / 60)
+
+
+# --- BUILDER ---
+
+def _day_slots(constraints):
+    """Yields (day name, muscle slots) with targeted muscles first and given one extra slot."""
+    templates = DAY_TEMPLATES[constraints.days_per_week]
+    targets = constraints.muscles
+    covered = {muscle for _, slots in templates for muscle in slots}
+    for day_name, slots in templates:
+        if targets:
+            # Targets no day trains are added to every day; the time budget decides what fits
+            focus = [muscle for muscle in targets if muscle in slots or muscle not in covered]
+            slots = tuple(sorted((*slots, *focus), key=lambda muscle: muscle not in targets))
+        yield day_name, slots
+
+def _pick(postings, allowed, used_today, week_uses):
+    """First allowed exercise not used today, preferring ones not used yet this week."""
+    fallback = None
+    for ex_id in postings:
+        if ex_id in allowed and ex_id not in used_today:
+            if not week_uses[ex_id]:
+                return ex_id
+            if fallback is None:
+                fallback = ex_id
+    return fallback
+
+class PlanCutShort(Exception):
+    """Raised by complete_plan when the time limit cut a plan short; plan holds the reduced plan."""
+
+    def __init__(self, plan):
+        super().__init__("The plan was cut short by the build time limit")
+        self.plan = plan
+
+# Custom plans are derived data like catalog plans; equal constraints share one plan.
+CUSTOM_PLAN_CACHE_SIZE = 256
+
+@functools.lru_cache(maxsize=CUSTOM_PLAN_CACHE_SIZE)
+def complete_plan(constraints, time_limit=BUILD_TIME_LIMIT):
+    """
+    Like build_plan, but raises PlanCutShort instead of returning a plan the time limit reduced.
+    lru_cache does not keep exceptions, so only complete plans are cached.
+    """
+    plan, complete = _build(constraints, time_limit)
+    if not complete:
+        raise PlanCutShort(plan)
+    return plan
+
+def build_plan(constraints, time_limit=BUILD_TIME_LIMIT):
+    """
+    Returns a plan {CUSTOM_VARIATION: (Day, ...)} that fits the constraints. Each day fills its
+    muscle slots with exercises that fit the remaining session time. Past the time limit only
+    the first exercise of each remaining day is chosen, so a valid plan is always returned;
+    such a plan is not cached, and the next request builds it again.
+    Raises ValueError if no exercise is allowed by the equipment and exclusions.
+    """
+    try:
+        return complete_plan(constraints, time_limit)
+    except PlanCutShort as cut_short:
+        return cut_short.plan
+
+def _build(constraints, time_limit):
+    """Builds a plan; returns (plan, complete) where complete is False if the time limit cut it short."""
+    index = load_exercise_index()
+    # The limit covers building, not a cold load of the library
+    deadline = time.perf_counter() + time_limit
+    allowed = index.allowed(constraints.equipment, constraints.exclude)
+    if not allowed:
+        raise ValueError("No exercises match the available equipment and exclusions")
+    sets, reps = base_volume(constraints.level, constraints.sentiment)
+    budget = constraints.minutes_per_session * 60
+    week_uses = collections.Counter()
+    complete = True
+
+    days = []
+    for day_name, slots in _day_slots(constraints):
+        chosen = []
+        used_today = set()
+        remaining = budget
+        for muscle in slots:
+            if chosen and time.perf_counter() > deadline:
+                complete = False
+                break
+            ex_id = _pick(index.by_muscle.get(muscle, ()), allowed, used_today, week_uses)
+            if ex_id is None:
+                continue
+            exercise = index.exercise(ex_id, sets, reps)
+            seconds = estimate_seconds(exercise)
+            # The first exercise is always kept so no day is empty
+            if chosen and seconds > remaining:
+                continue
+            chosen.append(exercise)
+            used_today.add(ex_id)
+            week_uses[ex_id] += 1
+            remaining -= seconds
+        if not chosen:
+            # None of the day's muscles has an allowed exercise; take any allowed one
+            ex_id = _pick(sorted(allowed), allowed, used_today, week_uses)
+            chosen.append(index.exercise(ex_id, sets, reps))
+            week_uses[ex_id] += 1
+        days.append(Day(day_name, tuple(chosen)))
+    return MappingProxyType({CUSTOM_VARIATION: tuple(days)}), complete
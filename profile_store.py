@@ -0,0 +1,99 @@
+"""
+Saved user profiles, so returning users can resume without redoing the forms and the survey.
+Each profile is split into sections (inputs, survey results, ...) stored as separate rows,
+so a page only reads the sections it needs.
+"""
+import datetime
+import json
+import sqlite3
+import threading
+
+from log_store import DEFAULT_DB_PATH
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile_sections (
+    user TEXT NOT NULL,
+    section TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    PRIMARY KEY (user, section)
+);
+"""
+
+
+class ProfileStore:
+    """
+    Profiles for all users in one SQLite file, keyed by user name or ID.
+    Sections hold JSON-serializable values; saving a section replaces its previous value.
+    There is no password or token: whoever knows a name can load and overwrite its profile.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        # Shared between Streamlit session threads, like the LogStore connection.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def save(self, user, section, data, invalidate=()):
+        """
+        Stores one section of a user's profile. Sections named in invalidate were derived
+        from the old value and are deleted in the same transaction.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM profile_sections WHERE user = ? AND section = ?", [(user, name) for name in invalidate]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profile_sections (user, section, data, updated) VALUES (?, ?, ?, ?)",
+                (user, section, json.dumps(data, separators=(",", ":")),
+                 datetime.datetime.now().isoformat(timespec="seconds"))
+            )
+
+    def load(self, user, section):
+        """Returns one section of a user's profile, or None if it was never saved."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM profile_sections WHERE user = ? AND section = ?", (user, section)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def sections(self, user):
+        """Returns {section: last saved "YYYY-MM-DDTHH:MM:SS"} without reading the section data."""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT section, updated FROM profile_sections WHERE user = ? ORDER BY section", (user,)
+            ))
+
+    def iter_section(self, section, batch_size=1000):
+        """Yields (user, data) for every user who saved a section, in user order, reading batch_size rows at a time."""
+        after = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT user, data FROM profile_sections WHERE section = ? AND user > ? ORDER BY user LIMIT ?",
+                    (section, after, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for user, data in rows:
+                yield user, json.loads(data)
+            after = rows[-1][0]
+
+    def delete(self, user, section=None):
+        """Removes one section, or the whole profile when no section is given."""
+        sql = "DELETE FROM profile_sections WHERE user = ?"
+        params = [user]
+        if section is not None:
+            sql += " AND section = ?"
+            params.append(section)
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
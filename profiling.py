@@ -0,0 +1,221 @@
+"""
+Opt-in timing and allocation instrumentation for the app stages.
+Enable with FITECH_PROFILE=1; add FITECH_PROFILE_ALLOC=1 to also trace allocated bytes with tracemalloc.
+Set FITECH_PROFILE_EXPORT to a path to write all measurements as JSON lines when the process exits.
+When disabled, timed() returns functions unchanged and measure() does nothing.
+"""
+import atexit
+import collections
+import contextlib
+import contextvars
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+
+ENABLED = os.environ.get("FITECH_PROFILE") == "1"
+TRACE_ALLOCATIONS = ENABLED and os.environ.get("FITECH_PROFILE_ALLOC") == "1"
+EXPORT_PATH = os.environ.get("FITECH_PROFILE_EXPORT") if ENABLED else None
+
+# Samples kept per (session, stage); older ones are dropped.
+MAX_SAMPLES = 1000
+# Sessions kept; the one that recorded least recently is dropped with all its samples.
+MAX_SESSIONS = 200
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Set by the app at the start of each rerun so measurements can be split per session.
+current_session = contextvars.ContextVar("current_session", default=None)
+
+# allocated_blocks is the net change in Python heap blocks; allocated_bytes needs tracemalloc and is None otherwise.
+Measurement = collections.namedtuple(
+    "Measurement", ["stage", "session", "seconds", "allocated_blocks", "allocated_bytes", "timestamp"]
+)
+
+
+def _percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    """
+    Thread-safe store of recent measurements, grouped by session and stage.
+    Only the max_sessions most recently active sessions are kept, so sessions that ended don't pile up.
+    """
+
+    def __init__(self, max_samples=MAX_SAMPLES, max_sessions=MAX_SESSIONS):
+        self.max_samples = max_samples
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        # session -> stage -> deque of samples, least recently active session first
+        self._sessions = collections.OrderedDict()
+
+    def record(self, measurement):
+        with self._lock:
+            stages = self._sessions.get(measurement.session)
+            if stages is None:
+                stages = self._sessions[measurement.session] = {}
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(measurement.session)
+            samples = stages.get(measurement.stage)
+            if samples is None:
+                samples = stages[measurement.stage] = collections.deque(maxlen=self.max_samples)
+            samples.append(measurement)
+
+    def measurements(self, session=None):
+        """Returns recorded measurements, optionally only those of one session."""
+        with self._lock:
+            groups = [
+                list(samples) for s, stages in self._sessions.items() if session is None or s == session
+                for samples in stages.values()
+            ]
+        return sorted((m for group in groups for m in group), key=lambda m: m.timestamp)
+
+    def summary(self, session=None):
+        """
+        Returns one dict per stage with count, latency percentiles (seconds) and mean allocated blocks.
+        Pass a session to get per-session percentiles; otherwise all sessions are combined.
+        """
+        by_stage = collections.defaultdict(list)
+        for m in self.measurements(session):
+            by_stage[m.stage].append(m)
+        rows = []
+        for stage, samples in sorted(by_stage.items()):
+            seconds = sorted(m.seconds for m in samples)
+            row = {"stage": stage, "count": len(samples), "sum": sum(seconds)}
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}"] = _percentile(seconds, q)
+            row["mean_allocated_blocks"] = sum(m.allocated_blocks for m in samples) / len(samples)
+            rows.append(row)
+        return rows
+
+    def export_jsonl(self, path, session=None):
+        """Writes every measurement as one JSON object per line. Returns the number written."""
+        measurements = self.measurements(session)
+        with open(path, "w", encoding="utf-8") as f:
+            for m in measurements:
+                f.write(json.dumps(m._asdict()) + "\n")
+        return len(measurements)
+
+    def prometheus_text(self):
+        """Formats the combined per-stage summary in the Prometheus text exposition format."""
+        lines = [
+            "# HELP fitech_stage_seconds Latency of each app stage.",
+            "# TYPE fitech_stage_seconds summary"
+        ]
+        rows = self.summary()
+        for row in rows:
+            stage = row["stage"].replace("\\", "\\\\").replace('"', '\\"')
+            for q in QUANTILES:
+                lines.append(f'fitech_stage_seconds{{stage="{stage}",quantile="{q}"}} {row[f"p{int(q * 100)}"]}')
+            lines.append(f'fitech_stage_seconds_sum{{stage="{stage}"}} {row["sum"]}')
+            lines.append(f'fitech_stage_seconds_count{{stage="{stage}"}} {row["count"]}')
+        lines += [
+            "# HELP fitech_stage_allocated_blocks Mean net Python heap blocks allocated per stage call.",
+            "# TYPE fitech_stage_allocated_blocks gauge"
+        ]
+        for row in rows:
+            stage = row["stage"].replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'fitech_stage_allocated_blocks{{stage="{stage}"}} {row["mean_allocated_blocks"]}')
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+RECORDER = Recorder()
+
+if EXPORT_PATH:
+    atexit.register(RECORDER.export_jsonl, EXPORT_PATH)
+
+
+@contextlib.contextmanager
+def measure(stage, recorder=None):
+    """Context manager that records the latency and allocations of the enclosed block."""
+    if not ENABLED:
+        yield
+        return
+    recorder = recorder or RECORDER
+    if TRACE_ALLOCATIONS and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    bytes_before = tracemalloc.get_traced_memory()[0] if TRACE_ALLOCATIONS else None
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        blocks = sys.getallocatedblocks() - blocks_before
+        allocated_bytes = tracemalloc.get_traced_memory()[0] - bytes_before if TRACE_ALLOCATIONS else None
+        recorder.record(Measurement(stage, current_session.get(), seconds, blocks, allocated_bytes, time.time()))
+
+
+def deep_sizeof(obj):
+    """
+    Approximate bytes held by an object and everything reachable through containers,
+    instance dicts and slots, counting each object once.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, type):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, collections.deque)):
+            stack.extend(o)
+        else:
+            if hasattr(o, "__dict__"):
+                stack.append(vars(o))
+            stack.extend(getattr(o, name) for name in getattr(type(o), "__slots__", ()) if hasattr(o, name))
+    return total
+
+
+def record_state(page, state, recorder=None):
+    """
+    Records the approximate size of a session's state after a rerun of a page: one measurement
+    "state:<page>" with the total bytes and one "state:<page>:<key>" per key, sharing a timestamp.
+    """
+    if not ENABLED:
+        return
+    recorder = recorder or RECORDER
+    session = current_session.get()
+    timestamp = time.time()
+    sizes = {key: deep_sizeof(value) for key, value in state.items()}
+    recorder.record(Measurement(f"state:{page}", session, 0.0, 0, sum(sizes.values()), timestamp))
+    for key, size in sizes.items():
+        recorder.record(Measurement(f"state:{page}:{key}", session, 0.0, 0, size, timestamp))
+
+
+def timed(stage):
+    """Decorator form of measure(). Returns the function untouched when profiling is off."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,185 @@
+"""
+Adaptive progression: turns logged sessions into week-over-week adjustments of sets, reps and rest.
+State is updated incrementally per log entry, so its size and update cost do not grow with history.
+"""
+import collections
+import datetime
+import functools
+import json
+import re
+
+from exercise_library import load_index
+
+
+# Progression steps per workout day are kept within this range.
+MIN_STEP = -2
+MAX_STEP = 4
+# Extra rest per deload step, in seconds.
+DELOAD_REST_SECONDS = 15
+# Suggested load increase per progression step, as a fraction of the last logged weight.
+LOAD_INCREASE_PER_STEP = 0.025
+# Distinct exercises whose last weight is remembered.
+MAX_WEIGHT_LABELS = 200
+
+_WEIGHT = re.compile(
+    r"(?P<label>[a-z][a-z '\-]*?)\s*[:=@\-]?\s*(?P<weight>\d+(?:\.\d+)?)\s*(?P<unit>kgs?|lbs?)\b",
+    re.IGNORECASE
+)
+_REST_SECONDS = re.compile(r"^\d+(-\d+)?s$")
+# A trailing "s" is dropped from each word when matching names, so "squat" finds "Squats".
+_PLURAL = re.compile(r"s\b")
+
+# Hashable snapshot used to derive a plan: ((day, step), ...) and ((exercise, kg), ...), both sorted.
+Adjustments = collections.namedtuple("Adjustments", ["steps", "weights"])
+
+
+def _normalize(name):
+    return _PLURAL.sub("", name.lower())
+
+@functools.lru_cache(maxsize=None)
+def _library_names():
+    """{normalized name: lowercased name} of every exercise in the library."""
+    return {_normalize(name): name.lower() for name in load_index().exercises}
+
+def resolve_exercise(label):
+    """
+    Returns the lowercased library exercise that a note label ends with, or None.
+    "Did bench press" resolves to "bench press" and "squat" to "squats"; "bench" resolves to nothing.
+    """
+    words = _normalize(label).split()
+    names = _library_names()
+    for start in range(len(words)):
+        name = names.get(" ".join(words[start:]))
+        if name is not None:
+            return name
+    return None
+
+def parse_weights(notes):
+    """
+    Extracts (exercise, kg) pairs such as "Bench press 60kg" or "squat: 135 lbs" from free-text notes.
+    Only weights whose label resolves to a library exercise are returned, keyed by its lowercased name.
+    """
+    pairs = []
+    for match in _WEIGHT.finditer(notes or ""):
+        exercise = resolve_exercise(match.group("label"))
+        if exercise is None:
+            continue
+        weight = float(match.group("weight"))
+        if match.group("unit").lower().startswith("lb"):
+            weight *= 0.4536
+        pairs.append((exercise, round(weight, 1)))
+    return pairs
+
+def _week_of(date):
+    year, week, _ = datetime.date.fromisoformat(date).isocalendar()
+    return f"{year}-W{week:02d}"
+
+def _next_step(step, completed, missed):
+    """A clean week moves a day up one step; a week with at least as many misses as completions moves it down."""
+    if completed and not missed:
+        return min(MAX_STEP, step + 1)
+    if missed >= completed:
+        return max(MIN_STEP, step - 1)
+    return step
+
+
+class ProgressionState:
+    """
+    Per-user progression state: the step of each workout day, this week's completed/missed
+    counts and the last logged weight per exercise (lowercased name). add() is O(1) per log entry.
+    """
+
+    __slots__ = ("week", "pending", "steps", "weights")
+
+    def __init__(self):
+        self.week = None
+        # workout day -> [completed, missed] for self.week
+        self.pending = {}
+        self.steps = {}
+        self.weights = {}
+
+    def add(self, date, workout_day, completed, notes="", exercises=()):
+        """
+        Folds one log entry into the state, closing the previous week when a new one starts.
+        Loads come from the entry's SetRecords, falling back to weights written in the notes.
+        """
+        week = _week_of(date)
+        if self.week is None:
+            self.week = week
+        elif week > self.week:
+            self._close_week()
+            self.week = week
+        counts = self.pending.setdefault(workout_day, [0, 0])
+        counts[0 if completed else 1] += 1
+        if completed:
+            loads = [(r.exercise.lower(), r.load) for r in exercises if r.load is not None]
+            for label, weight in loads or parse_weights(notes):
+                # Re-insert so the least recently logged label is the one dropped
+                self.weights.pop(label, None)
+                self.weights[label] = weight
+            while len(self.weights) > MAX_WEIGHT_LABELS:
+                del self.weights[next(iter(self.weights))]
+
+    def _close_week(self):
+        for day, (completed, missed) in self.pending.items():
+            self.steps[day] = _next_step(self.steps.get(day, 0), completed, missed)
+        self.pending = {}
+
+    def adjustments(self, today=None):
+        """Returns the Adjustments to apply today, counting the last logged week once it is over."""
+        steps = dict(self.steps)
+        if self.pending and self.week < _week_of((today or datetime.date.today()).isoformat()):
+            for day, (completed, missed) in self.pending.items():
+                steps[day] = _next_step(steps.get(day, 0), completed, missed)
+        return Adjustments(
+            tuple(sorted((day, step) for day, step in steps.items() if step)),
+            tuple(sorted(self.weights.items()))
+        )
+
+    def to_json(self):
+        return json.dumps({name: getattr(self, name) for name in self.__slots__}, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        state = cls()
+        for name, value in json.loads(text).items():
+            setattr(state, name, value)
+        return state
+
+
+# --- PLAN ADJUSTMENT ---
+
+def _longer_rest(rest, extra_seconds):
+    if rest and _REST_SECONDS.match(rest):
+        return re.sub(r"\d+", lambda m: str(int(m.group()) + extra_seconds), rest)
+    return rest
+
+def progress_exercise(exercise, step, weight=None):
+    """Returns the exercise adjusted for a progression step and, if known, the last logged weight."""
+    sets, reps, rest, focus = exercise.sets, exercise.reps, exercise.rest, exercise.focus
+    if step > 0:
+        if isinstance(reps, int):
+            reps += step
+        if isinstance(sets, int) and step >= 3:
+            sets += 1
+    elif step < 0:
+        if isinstance(sets, int):
+            sets = max(1, sets + step)
+        rest = _longer_rest(rest, -step * DELOAD_REST_SECONDS)
+    if weight is not None:
+        factor = 1 + LOAD_INCREASE_PER_STEP * step if step >= 0 else 0.9
+        target = round(weight * factor * 2) / 2
+        note = f"Last load: {weight:g}kg, try {target:g}kg"
+        focus = f"{focus} | {note}" if focus else note
+    return exercise._replace(sets=sets, reps=reps, rest=rest, focus=focus)
+
+def progress_day(day, adjustments):
+    """Applies Adjustments to one Day of a plan."""
+    step = dict(adjustments.steps).get(day.name, 0)
+    weights = dict(adjustments.weights)
+    if not step and not weights:
+        return day
+    return day._replace(exercises=tuple(
+        # Only a load logged for this exact exercise applies; "Squats" says nothing about "Jump Squats"
+        progress_exercise(ex, step, weights.get(ex.name.lower())) for ex in day.exercises
+    ))
@@ -0,0 +1,32 @@
+"""Tests that vectorized survey scoring agrees with engine.score_survey."""
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import engine
+from bulk_scoring import CATEGORIES, score_responses
+
+
+def _random_responses(count, seed=0):
+    rng = random.Random(seed)
+    return [[rng.randint(engine.MIN_ANSWER, engine.MAX_ANSWER) for _ in engine.QUESTIONS] for _ in range(count)]
+
+def test_bulk_scores_match_the_scalar_scorer():
+    # All-low and all-high rows cover the band edges
+    responses = _random_responses(200) + [[engine.MIN_ANSWER] * 36, [engine.MAX_ANSWER] * 36]
+    bulk = score_responses(responses)
+    for row, answers in enumerate(responses):
+        scores = engine.score_survey(answers)
+        assert bulk.totals[row] == scores.total
+        assert bulk.bands[row] == engine.score_band(scores.total)
+        for column, name in enumerate(CATEGORIES):
+            assert (bulk.sentiments[row, column], bulk.category_sums[row, column]) == scores.categories[name]
+
+@pytest.mark.parametrize("responses", [
+    [[3] * 35 + [0]], [[3] * 35 + [6]], [[3.5] * 36], [["3"] * 36], [[3] * 35],
+])
+def test_invalid_answers_are_rejected(responses):
+    with pytest.raises(ValueError):
+        score_responses(responses)
@@ -0,0 +1,58 @@
+"""Tests for parsing imported workout logs and the import command line."""
+import datetime
+
+import pytest
+
+from data_transfer import main, parse_log_rows
+from workout_log import SetRecord
+
+
+def _row(**values):
+    row = {"user": "u", "date": "2024-01-01", "workout_day": "Push", "exercise": "", "sets": "", "reps": "", "load": ""}
+    row.update(values)
+    return row
+
+def test_rows_of_one_session_form_one_entry():
+    rows = [_row(exercise="Bench Press", sets="3", reps="8", load="60.5"), _row(exercise="Push-ups", sets="2", reps="15")]
+    [(user, entry)] = parse_log_rows(rows)
+    assert (user, entry.date, entry.workout_day) == ("u", datetime.date(2024, 1, 1), "Push")
+    assert entry.exercises == (SetRecord("Bench Press", 3, 8, 60.5), SetRecord("Push-ups", 2, 15, None))
+
+@pytest.mark.parametrize("row, message", [
+    (_row(date=""), "needs a date"),
+    (_row(date=None), "needs a date"),
+    (_row(workout_day="  "), "no workout day"),
+    (_row(sets="2.5", exercise="Squats"), "whole number"),
+])
+def test_incomplete_rows_are_rejected(row, message):
+    with pytest.raises(ValueError, match=message):
+        list(parse_log_rows([row]))
+
+@pytest.mark.parametrize("column", ["date", "day=Date"])
+def test_bad_column_mappings_are_usage_errors(tmp_path, column, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--db", str(tmp_path / "logs.db"), "import-logs", str(tmp_path / "logs.csv"), "--column", column])
+    assert exit_info.value.code == 2
+    assert "argument --column" in capsys.readouterr().err
+
+def test_a_failed_import_exits_with_a_message(tmp_path):
+    path = tmp_path / "logs.csv"
+    path.write_text("user,date,workout_day\nu,2024-01-01,Push\nu,,Pull\n", encoding="utf-8")
+    with pytest.raises(SystemExit, match="nothing imported: Every row needs a date"):
+        main(["--db", str(tmp_path / "logs.db"), "import-logs", str(path)])
+
+@pytest.mark.parametrize("args", [
+    [], ["--split", "Upper-Lower", "--sport", "Tennis"], ["--split", "Full Body"], ["--sport", "Chess"],
+    ["--sport", "Tennis", "--sentiment", "happy"], ["--sport", "Tennis", "--weeks", "30"],
+])
+def test_export_program_rejects_bad_inputs(tmp_path, args):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["export-program", str(tmp_path / "program.csv")] + args)
+    assert exit_info.value.code == 2
+    assert not (tmp_path / "program.csv").exists()
+
+def test_export_program_writes_every_week(tmp_path):
+    path = tmp_path / "program.csv"
+    assert main(["export-program", str(path), "--sport", "Tennis", "--weeks", "4"]) == 0
+    weeks = {line.split(",")[0] for line in path.read_text(encoding="utf-8").splitlines()[1:]}
+    assert weeks == {"1", "2", "3", "4"}
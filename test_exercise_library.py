@@ -0,0 +1,85 @@
+"""Tests for the exercise library files and the plans built from them."""
+import json
+import os
+import re
+import shutil
+
+import pytest
+
+import engine
+from exercise_library import LIBRARY_DIR, load_attributes, load_index, load_program
+
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plan_snapshot.json")
+
+
+def _snapshot_key(key):
+    return "/".join(str(part) for part in key)
+
+def _plans():
+    return {_snapshot_key(key): engine.plan_to_dict(engine.get_plan(key)) for key in engine.all_plan_keys()}
+
+def write_snapshot(path=SNAPSHOT_PATH):
+    """Rewrites the snapshot from the current library, one plan per line."""
+    lines = (f"{json.dumps(key)}: {json.dumps(plan)}" for key, plan in _plans().items())
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{\n" + ",\n".join(lines) + "\n}\n")
+
+def test_every_plan_matches_the_snapshot():
+    with open(SNAPSHOT_PATH, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    plans = _plans()
+    assert plans.keys() == snapshot.keys()
+    for key, plan in plans.items():
+        assert plan == snapshot[key], key
+
+
+@pytest.fixture
+def library(tmp_path):
+    """A copy of the library that a test can break; loads are cached per directory, so each copy is fresh."""
+    directory = tmp_path / "library"
+    shutil.copytree(LIBRARY_DIR, directory)
+    return directory
+
+def _edit(path, change):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    change(data)
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+def _first_row(data):
+    return next(iter(data["variations"].values()))[0][1][0]
+
+def _set_row_id(data, value):
+    _first_row(data)[0] = value
+
+def _set_row_sets(data, value):
+    _first_row(data)[1] = value
+
+@pytest.mark.parametrize("change, message", [
+    (lambda data: data.update(version=2), "unsupported library version 2"),
+    (lambda data: data.update(name="Bro Split"), "does not describe"),
+    (lambda data: data.update(variations=[]), "'variations' must be an object"),
+    (lambda data: _set_row_id(data, 10_000), "unknown exercise id 10000"),
+    (lambda data: _set_row_sets(data, "=x+1"), "invalid formula '=x+1'"),
+    (lambda data: _set_row_sets(data, 3.5), "invalid amount 3.5"),
+])
+def test_program_schema_errors_name_the_file(library, change, message):
+    path = library / "bodybuilding" / "upper-lower.json"
+    _edit(path, change)
+    with pytest.raises(ValueError, match=re.escape(message)) as error:
+        load_program("Bodybuilding", "Upper-Lower", str(library))
+    assert str(path) in str(error.value)
+
+def test_index_schema_errors(library):
+    _edit(library / "index.json", lambda data: data.update(exercises="Bench Press"))
+    with pytest.raises(ValueError, match="'exercises' must be a list of names"):
+        load_index(str(library))
+
+def test_attributes_must_name_library_exercises(library):
+    _edit(library / "attributes.json", lambda data: data["exercises"].update({"Moon Press": {"equipment": []}}))
+    with pytest.raises(ValueError, match="unknown exercise 'Moon Press'"):
+        load_attributes(str(library))
+
+
+if __name__ == "__main__":
+    write_snapshot()
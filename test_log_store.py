@@ -0,0 +1,133 @@
+"""Tests for the SQLite log store: appends, running aggregates and several stores sharing one file."""
+import datetime
+import sqlite3
+import threading
+
+import pytest
+
+from log_store import LogStore
+from workout_log import LogEntry, SetRecord
+
+
+def _entry(day, workout_day="Push", completed=True, exercises=()):
+    return LogEntry(datetime.date(2024, 1, 1) + datetime.timedelta(days=day), workout_day, completed, "", exercises)
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "logs.db")
+
+@pytest.fixture
+def store(db_path):
+    store = LogStore(db_path)
+    yield store
+    store.close()
+
+
+def test_append_round_trips_entries_and_sets(store):
+    sets = (SetRecord("Bench Press", 3, 8, 60.0), SetRecord("Push-ups", 2, 15, None))
+    store.append("u", _entry(0, exercises=sets))
+    store.append("u", _entry(1, "Pull", completed=False))
+
+    newest, oldest = store.query("u")
+    assert (newest.workout_day, newest.completed, newest.exercises) == ("Pull", False, ())
+    assert oldest.exercises == sets
+    assert store.count("u") == 2
+    assert store.count("u", workout_day="Push") == 1
+    assert store.count("other") == 0
+
+def test_bulk_append_returns_count_and_keeps_sets_with_their_entry(store):
+    entries = [_entry(day, exercises=(SetRecord(f"Exercise {day}", 3, day, None),)) for day in range(5)]
+    assert store.bulk_append("u", entries) == 5
+    assert [entry.exercises for entry in store.query("u")] == [entry.exercises for entry in reversed(entries)]
+
+@pytest.mark.parametrize("record", [
+    SetRecord("Squats", -1, 8, None), SetRecord("Squats", 3, 70000, None), SetRecord("Squats", 3, 8, -20.0)
+])
+def test_invalid_sets_are_rejected_before_anything_is_written(store, record):
+    with pytest.raises(ValueError):
+        store.bulk_append("u", [_entry(0), _entry(1, exercises=(record,))])
+    assert store.count("u") == 0
+    assert store.stats("u").total == 0
+
+def test_aggregates_follow_appends(store):
+    store.bulk_append("u", [_entry(0), _entry(1), _entry(2, completed=False), _entry(3)])
+    stats = store.stats("u")
+    assert (stats.total, stats.completed) == (4, 3)
+    assert (stats.current_streak, stats.best_streak) == (1, 2)
+    assert stats.day_totals == {"Push": [4, 3]}
+
+def test_missing_aggregates_are_rebuilt_once_and_saved(store, db_path):
+    store.bulk_append("u", [_entry(0), _entry(1)])
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM log_stats")
+    assert store.stats("u").total == 2
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM log_stats WHERE user = 'u'").fetchone()[0] == 1
+
+@pytest.mark.parametrize("store_count", [2, 4])
+def test_concurrent_stores_on_one_file_lose_no_updates(db_path, store_count):
+    stores = [LogStore(db_path) for _ in range(store_count)]
+    per_store = 25
+
+    def log(store, offset):
+        for i in range(per_store):
+            store.append("u", _entry(offset + i, exercises=(SetRecord(f"Exercise {offset + i}", 1, 1, 10.0),)))
+
+    threads = [threading.Thread(target=log, args=(store, n * per_store)) for n, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = store_count * per_store
+    check = stores[0]
+    assert check.count("u") == total
+    assert check.stats("u").total == total
+    # One load per entry, so a lost progression update drops a remembered weight
+    assert len(check.progression("u").weights) == total
+    # Every entry kept exactly its own exercise row
+    entries = check.query("u")
+    assert sorted(entry.exercises[0].exercise for entry in entries) == sorted(f"Exercise {n}" for n in range(total))
+    assert all(entry.exercises[0].exercise == f"Exercise {(entry.date - datetime.date(2024, 1, 1)).days}" for entry in entries)
+    for store in stores:
+        store.close()
+
+def test_import_is_all_or_nothing(store):
+    def pairs():
+        yield from (("u", _entry(day)) for day in range(5))
+        raise ValueError("bad row")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            store.import_entries(pairs())
+        assert store.count("u") == 0
+    assert store.import_entries(("u", _entry(day)) for day in range(5)) == 5
+
+def test_out_of_order_entries_rebuild_the_aggregates(store):
+    # Newest first, as in a newest-first export
+    store.import_entries(("u", _entry(day)) for day in reversed(range(4)))
+    # A missed session backfilled before the last two
+    store.append("u", _entry(1, completed=False))
+    stats = store.stats("u")
+    assert (stats.total, stats.current_streak, stats.best_streak) == (5, 2, 2)
+
+def test_columns_return_loads_exactly_as_logged(store):
+    sets = (SetRecord("Bench Press", 3, 8, 62.3), SetRecord("Push-ups", 2, 15, None))
+    store.append("u", _entry(0, exercises=sets))
+    assert store.columns("u").entry(0).exercises == sets
+
+def test_import_does_not_lock_the_store_while_parsing(store):
+    appended = []
+
+    def pairs():
+        yield "u", _entry(0)
+        # Another session logs a workout while the import is still reading its file
+        other = threading.Thread(target=lambda: appended.append(store.append("v", _entry(0))))
+        other.start()
+        other.join(timeout=5)
+        yield "u", _entry(1, exercises=(SetRecord("Squats", 3, 8, 80.0),))
+
+    assert store.import_entries(pairs()) == 2
+    assert appended == [None]
+    assert [entry.exercises for entry in store.query("u")] == [(SetRecord("Squats", 3, 8, 80.0),), ()]
+    assert (store.count("v"), store.stats("u").total, store.stats("v").total) == (1, 2, 1)
@@ -0,0 +1,41 @@
+"""Tests for periodized programs: deload weeks, variation rotation and progression steps."""
+import pytest
+
+from engine import get_plan
+from periodization import DELOAD_STEP, make_program, program_week, schedule
+
+
+KEY = ("Bodybuilding", "Upper-Lower", "Intermediate", "positive", "Weight Gain")
+
+def test_the_last_week_of_each_block_is_a_deload():
+    program = make_program(KEY, weeks=10, block_weeks=4)
+    weeks = schedule(program)
+    assert [week.number for week in weeks if week.deload] == [4, 8]
+    assert all(week.step == DELOAD_STEP for week in weeks if week.deload)
+    assert all(week.step >= 0 for week in weeks if not week.deload)
+
+def test_each_block_rotates_to_the_next_variation():
+    variations = list(get_plan(KEY))
+    assert len(variations) == 2
+    weeks = schedule(make_program(KEY, weeks=12, block_weeks=4))
+    assert [week.variation for week in weeks] == [variations[0]] * 4 + [variations[1]] * 4 + [variations[0]] * 4
+
+@pytest.mark.parametrize("model, steps", [
+    ("Linear", [0, 1, 2, DELOAD_STEP, 1, 2, 3, DELOAD_STEP]),
+    ("Undulating", [0, 2, 1, DELOAD_STEP, 0, 2, 1, DELOAD_STEP]),
+])
+def test_progression_models_step_through_each_block(model, steps):
+    assert [week.step for week in schedule(make_program(KEY, weeks=8, model=model))] == steps
+
+def test_deload_weeks_drop_a_set_from_the_weekly_plan():
+    program = make_program(KEY, weeks=4)
+    base_days = get_plan(KEY)[program_week(program, 4).variation]
+    for base_day, day in zip(base_days, program_week(program, 4).days):
+        for base, exercise in zip(base_day.exercises, day.exercises):
+            if isinstance(base.sets, int):
+                assert exercise.sets == max(1, base.sets - 1)
+
+@pytest.mark.parametrize("weeks, block_weeks", [(3, 2), (17, 4), (8, 1), (8, 9)])
+def test_out_of_range_programs_are_rejected(weeks, block_weeks):
+    with pytest.raises(ValueError):
+        make_program(KEY, weeks=weeks, block_weeks=block_weeks)
@@ -0,0 +1,46 @@
+"""Tests for custom plans built from constraints."""
+import pytest
+
+from exercise_library import load_attributes
+from plan_builder import (
+    CUSTOM_VARIATION, DAY_TEMPLATES, PlanCutShort, build_plan, complete_plan, estimate_seconds, load_exercise_index,
+    make_constraints
+)
+
+
+def _exercises(plan):
+    return [exercise for day in plan[CUSTOM_VARIATION] for exercise in day.exercises]
+
+@pytest.mark.parametrize("equipment", [(), ("dumbbell",), ("barbell", "bench", "pull-up-bar")])
+def test_exercises_only_need_the_available_equipment(equipment):
+    attributes = load_attributes()
+    plan = build_plan(make_constraints(4, 60, equipment))
+    assert all(attributes[exercise.name].equipment <= set(equipment) for exercise in _exercises(plan))
+
+def test_excluded_exercises_are_never_chosen():
+    constraints = make_constraints(3, 60, ("barbell", "bench", "dumbbell"))
+    exclude = {exercise.name for exercise in _exercises(build_plan(constraints))}
+    plan = build_plan(constraints._replace(exclude=tuple(sorted(exclude))))
+    assert not exclude & {exercise.name for exercise in _exercises(plan)}
+
+@pytest.mark.parametrize("days, minutes", [(1, 15), (3, 30), (5, 60), (6, 180)])
+def test_days_stay_within_the_session_time(days, minutes):
+    plan = build_plan(make_constraints(days, minutes, ("barbell", "bench", "dumbbell", "cable")))
+    assert [day.name for day in plan[CUSTOM_VARIATION]] == [name for name, _ in DAY_TEMPLATES[days]]
+    for day in plan[CUSTOM_VARIATION]:
+        # The first exercise is kept even if it alone runs over
+        assert len(day.exercises) == 1 or sum(map(estimate_seconds, day.exercises)) <= minutes * 60
+
+def test_plans_cut_short_by_the_time_limit_are_not_cached():
+    constraints = make_constraints(5, 90, ("dumbbell", "bench"))
+    load_exercise_index()
+    with pytest.raises(PlanCutShort) as cut_short:
+        complete_plan(constraints, 0)
+    assert all(len(day.exercises) == 1 for day in cut_short.value.plan[CUSTOM_VARIATION])
+    assert build_plan(constraints, 0) == cut_short.value.plan
+    # A later request with time to spare builds the whole plan
+    assert len(_exercises(build_plan(constraints))) > len(_exercises(cut_short.value.plan))
+
+def test_no_allowed_exercise_is_an_error():
+    with pytest.raises(ValueError, match="No exercises match"):
+        build_plan(make_constraints(3, 45, exclude=load_exercise_index().names))
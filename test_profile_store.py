@@ -0,0 +1,52 @@
+"""Tests for saved profiles and restoring a saved survey into a session."""
+import sys
+
+import pytest
+
+import bench
+from profile_store import ProfileStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.db"))
+    yield store
+    store.close()
+
+@pytest.fixture
+def app(monkeypatch, store):
+    st = bench._mock_streamlit()
+    monkeypatch.setitem(sys.modules, "streamlit", st)
+    monkeypatch.delitem(sys.modules, "TF21", raising=False)
+    import TF21
+    monkeypatch.setattr(TF21, "get_profile_store", lambda: store)
+    st.session_state.session_id = "session-1"
+    yield TF21
+    sys.modules.pop("TF21", None)
+
+def test_saving_with_invalidate_drops_derived_sections(store):
+    store.save("ana", "user_data", {"goal_type": "Sports"})
+    store.save("ana", "survey", {"total": 90})
+    store.save("ben", "survey", {"total": 80})
+    store.save("ana", "user_data", {"goal_type": "Bodybuilding"}, invalidate=("survey",))
+    assert store.load("ana", "user_data") == {"goal_type": "Bodybuilding"}
+    assert store.load("ana", "survey") is None
+    # Other users keep their sections
+    assert store.load("ben", "survey") == {"total": 80}
+    assert list(store.sections("ana")) == ["user_data"]
+
+def test_saved_survey_restores_the_same_result(app, store):
+    responses = bytes([1, 2, 3, 4, 5, 3] * 6)
+    app.save_survey("ana", responses)
+    shown = app.st.session_state.survey_result
+    # A later session with another seed must show the saved quotes, not new ones
+    app.st.session_state.session_id = "session-2"
+    assert app._saved_survey_result(store.load("ana", "survey")) == shown
+
+def test_surveys_saved_without_quotes_get_new_ones(app, store):
+    responses = [3] * 36
+    app.save_survey("ana", responses)
+    survey = store.load("ana", "survey")
+    del survey["quotes"]
+    result = app._saved_survey_result(survey)
+    assert result.total == app.st.session_state.survey_result.total == 108
@@ -0,0 +1,23 @@
+"""Tests for the measurement recorder."""
+from profiling import Measurement, Recorder
+
+
+def _measurement(session, stage="render", timestamp=0.0):
+    return Measurement(stage, session, 0.01, 0, None, timestamp)
+
+def test_least_recently_active_sessions_are_evicted():
+    recorder = Recorder(max_sessions=2)
+    recorder.record(_measurement("a", timestamp=1))
+    recorder.record(_measurement("b", timestamp=2))
+    # "a" records again, so "b" is now the least recently active
+    recorder.record(_measurement("a", "state:survey", timestamp=3))
+    recorder.record(_measurement("c", timestamp=4))
+    assert recorder.measurements("b") == []
+    assert [m.timestamp for m in recorder.measurements()] == [1, 3, 4]
+
+def test_samples_per_stage_are_capped():
+    recorder = Recorder(max_samples=3)
+    for timestamp in range(5):
+        recorder.record(_measurement("a", timestamp=timestamp))
+    assert [m.timestamp for m in recorder.measurements("a")] == [2, 3, 4]
+    assert recorder.summary("a")[0]["count"] == 3
@@ -0,0 +1,24 @@
+"""Tests for matching logged loads to plan exercises."""
+from engine import Day, Exercise
+from progression import Adjustments, ProgressionState, parse_weights, progress_day
+from workout_log import SetRecord
+
+
+def _focus(day, weights):
+    return [ex.focus for ex in progress_day(day, Adjustments((), tuple(sorted(weights.items())))).exercises]
+
+def test_note_labels_resolve_to_library_exercises():
+    assert parse_weights("Did bench press 60kg") == [("bench press", 60.0)]
+    assert parse_weights("squat: 135 lbs") == [("squats", 61.2)]
+
+def test_note_labels_without_a_library_exercise_are_dropped():
+    assert parse_weights("Did bench 60kg, felt great 2 kg down") == []
+
+def test_loads_only_apply_to_the_exact_exercise():
+    day = Day("Legs", (Exercise("Squats", 3, 8, "60s"), Exercise("Jump Squats", 3, 8, "60s"), Exercise("Goblet Squats", 3, 8, "60s")))
+    assert _focus(day, {"squats": 100.0}) == ["Last load: 100kg, try 100kg", None, None]
+
+def test_set_record_loads_are_kept_by_exercise_name():
+    state = ProgressionState()
+    state.add("2024-01-01", "Push", True, "Did bench 60kg", (SetRecord("Incline Bench Press", 3, 8, 40.0),))
+    assert state.weights == {"incline bench press": 40.0}
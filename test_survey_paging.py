@@ -0,0 +1,52 @@
+"""Tests for the survey page form callbacks, run against a stand-in streamlit module."""
+import sys
+
+import pytest
+
+import bench
+
+
+@pytest.fixture
+def app(monkeypatch):
+    st = bench._mock_streamlit()
+    monkeypatch.setitem(sys.modules, "streamlit", st)
+    monkeypatch.delitem(sys.modules, "TF21", raising=False)
+    import TF21
+    st.session_state.survey_state = {"responses": bytearray(), "current_question": 0}
+    yield TF21
+    sys.modules.pop("TF21", None)
+
+def _answer(app, start, stop, value=3):
+    app.st.session_state.update({f"ans_{i}": value for i in range(start, stop)})
+
+def test_a_complete_page_is_stored_and_advances(app):
+    _answer(app, 0, 6, value=4)
+    app._submit_survey_page(0, 6)
+    state = app.st.session_state.survey_state
+    assert (state["current_question"], state["incomplete"]) == (6, False)
+    assert state["responses"] == bytearray([4] * 6)
+
+def test_an_incomplete_page_is_rejected(app):
+    _answer(app, 0, 5)
+    app._submit_survey_page(0, 6)
+    state = app.st.session_state.survey_state
+    assert (state["current_question"], state["incomplete"]) == (0, True)
+    assert state["responses"] == bytearray()
+
+def test_back_returns_a_page_and_drops_its_answers(app):
+    _answer(app, 0, 6, value=2)
+    app._submit_survey_page(0, 6)
+    _answer(app, 6, 12, value=5)
+    app._submit_survey_page(6, 12)
+    app._survey_back(6)
+    state = app.st.session_state.survey_state
+    assert state["current_question"] == 6
+    assert state["responses"] == bytearray([2] * 6)
+
+def test_resubmitting_a_page_replaces_its_answers(app):
+    _answer(app, 0, 6, value=2)
+    app._submit_survey_page(0, 6)
+    app._survey_back(6)
+    _answer(app, 0, 6, value=1)
+    app._submit_survey_page(0, 6)
+    assert app.st.session_state.survey_state["responses"] == bytearray([1] * 6)
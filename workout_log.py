@@ -0,0 +1,134 @@
+"""
+Typed workout log entries and a compact columnar container for them.
+Formatting (emoji flags, date strings) only happens in format_entry, at display time.
+"""
+import array
+import collections
+import datetime
+import math
+
+
+# One exercise performed in a session. sets/reps are ints or None; load is in kg or None.
+SetRecord = collections.namedtuple("SetRecord", ["exercise", "sets", "reps", "load"])
+# date is a datetime.date, completed a bool, exercises a tuple of SetRecord.
+LogEntry = collections.namedtuple("LogEntry", ["date", "workout_day", "completed", "notes", "exercises"], defaults=("", ()))
+
+COMPLETED_FLAGS = {True: "✅", False: "❌"}
+# Largest sets or reps count accepted for one exercise; also keeps counts within LogColumns' 16-bit arrays.
+MAX_COUNT = 999
+
+
+def check_entry(entry):
+    """Raises ValueError unless every exercise has whole sets/reps of 0-MAX_COUNT and a non-negative load (or None)."""
+    for record in entry.exercises:
+        for field in ("sets", "reps"):
+            value = getattr(record, field)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= MAX_COUNT):
+                raise ValueError(f"{record.exercise}: {field} must be a whole number from 0 to {MAX_COUNT}, got {value!r}")
+        if record.load is not None and not (isinstance(record.load, (int, float)) and 0 <= record.load < math.inf):
+            raise ValueError(f"{record.exercise}: load must be a non-negative number of kg, got {record.load!r}")
+
+
+def entry_from_dict(data):
+    """
+    Builds a LogEntry from the display/import shape {"Date", "Workout Day", "Completed", "Notes"},
+    where Completed may be a bool or a ✅/❌ flag and Date a "YYYY-MM-DD" string or a date.
+    """
+    date = data["Date"]
+    if isinstance(date, str):
+        date = datetime.date.fromisoformat(date)
+    completed = data.get("Completed")
+    if isinstance(completed, str):
+        completed = completed == COMPLETED_FLAGS[True]
+    exercises = tuple(SetRecord(*record) for record in data.get("Exercises", ()))
+    return LogEntry(date, data["Workout Day"], bool(completed), data.get("Notes") or "", exercises)
+
+def _format_exercise(record):
+    text = record.exercise
+    if record.sets is not None and record.reps is not None:
+        text += f" {record.sets}×{record.reps}"
+    if record.load is not None:
+        text += f" @ {record.load:g}kg"
+    return text
+
+def format_entry(entry):
+    """Formats a LogEntry as a row for the history table."""
+    return {
+        "Date": entry.date.strftime("%Y-%m-%d"),
+        "Workout Day": entry.workout_day,
+        "Completed": COMPLETED_FLAGS[bool(entry.completed)],
+        "Exercises": "; ".join(_format_exercise(r) for r in entry.exercises),
+        "Notes": entry.notes
+    }
+
+
+class LogColumns:
+    """
+    Workout log held as parallel typed arrays: date ordinals, day category codes and completion
+    flags per entry, plus flattened per-exercise sets/reps/load arrays indexed by ex_offsets.
+    Notes are not kept; use the LogStore for full entries.
+    """
+
+    __slots__ = ("dates", "day_codes", "completed", "days", "_day_index",
+                 "ex_offsets", "ex_codes", "ex_sets", "ex_reps", "ex_loads", "exercises", "_exercise_index")
+
+    # Sentinel for a missing set/rep count in the unsigned arrays; missing loads are NaN.
+    MISSING = 0xFFFF
+
+    def __init__(self, entries=()):
+        self.dates = array.array("l")
+        self.day_codes = array.array("H")
+        self.completed = array.array("B")
+        self.days = []
+        self._day_index = {}
+        # Entry i owns exercise rows ex_offsets[i]:ex_offsets[i + 1]
+        self.ex_offsets = array.array("L", [0])
+        self.ex_codes = array.array("H")
+        self.ex_sets = array.array("H")
+        self.ex_reps = array.array("H")
+        # Doubles, so loads come back exactly as logged (float32 would turn 62.3 into 62.29999923706055)
+        self.ex_loads = array.array("d")
+        self.exercises = []
+        self._exercise_index = {}
+        self.extend(entries)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @staticmethod
+    def _code(name, names, index):
+        code = index.get(name)
+        if code is None:
+            code = index[name] = len(names)
+            names.append(name)
+        return code
+
+    def append(self, entry):
+        self.dates.append(entry.date.toordinal())
+        self.day_codes.append(self._code(entry.workout_day, self.days, self._day_index))
+        self.completed.append(1 if entry.completed else 0)
+        for record in entry.exercises:
+            self.ex_codes.append(self._code(record.exercise, self.exercises, self._exercise_index))
+            self.ex_sets.append(self.MISSING if record.sets is None else record.sets)
+            self.ex_reps.append(self.MISSING if record.reps is None else record.reps)
+            self.ex_loads.append(float("nan") if record.load is None else record.load)
+        self.ex_offsets.append(len(self.ex_codes))
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def entry(self, i):
+        """Rebuilds entry i as a LogEntry (without notes)."""
+        records = tuple(
+            SetRecord(
+                self.exercises[self.ex_codes[j]],
+                None if self.ex_sets[j] == self.MISSING else self.ex_sets[j],
+                None if self.ex_reps[j] == self.MISSING else self.ex_reps[j],
+                None if self.ex_loads[j] != self.ex_loads[j] else self.ex_loads[j]
+            )
+            for j in range(self.ex_offsets[i], self.ex_offsets[i + 1])
+        )
+        return LogEntry(
+            datetime.date.fromordinal(self.dates[i]), self.days[self.day_codes[i]], bool(self.completed[i]), "", records
+        )